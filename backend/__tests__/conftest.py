@@ -1,18 +1,28 @@
-from collections.abc import Generator
+import os
+from collections.abc import AsyncGenerator, Generator
+
+# Shared-cache in-memory database, so the sync and async engines see the same
+# data. The StaticPool connection keeps it alive between tests.
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:job_tracker_tests?mode=memory&cache=shared&uri=true"
+ASYNC_SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://")
+
+# The app builds its engines and runs its startup backfills on import: point
+# them at the test database instead of ./jobs.db
+os.environ["DATABASE_URL"] = SQLALCHEMY_DATABASE_URL
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
-from backend.app.db.database import get_db
+from backend.app.db.database import get_async_db, get_db
+from backend.app import main
 from backend.app.main import app
 from backend.app.models.models import Base
 
 
-SQLALCHEMY_DATABASE_URL = "sqlite://"
-
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
@@ -20,6 +30,11 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def override_get_db() -> Generator[Session, None, None]:
     db = TestingSessionLocal()
@@ -29,11 +44,17 @@ def override_get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def override_get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture(autouse=True)
 def reset_database() -> Generator[None, None, None]:
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     try:
         yield
     finally:
@@ -50,6 +71,8 @@ def db_session() -> Generator[Session, None, None]:
 
 
 @pytest.fixture
-def client() -> Generator[TestClient, None, None]:
+def client(monkeypatch: pytest.MonkeyPatch) -> Generator[TestClient, None, None]:
+    # The lifespan tasks (reminder schedule, archiver) open their own sessions
+    monkeypatch.setattr(main, "AsyncSessionLocal", AsyncTestingSessionLocal)
     with TestClient(app) as test_client:
         yield test_client
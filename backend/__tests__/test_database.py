@@ -1,6 +1,19 @@
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, inspect, text
+from sqlalchemy.schema import CreateTable
 
 from backend.app.crud import crud
+from backend.app.db.database import (
+    DatabaseSettings,
+    add_missing_columns,
+    async_database_url,
+    create_db_engine,
+    rebuild_with_autoincrement,
+)
+from backend.app.db.search_index import install_search_index
+from backend.app.models import models
 from backend.app.schemas import schemas
 
 
@@ -79,3 +92,544 @@ def test_get_jobs_by_filters_respects_sort_order(db_session):
     )
 
     assert [job.title for job in results] == ["Backend Engineer", "Frontend Engineer"]
+
+
+def test_create_jobs_batch_returns_created_and_existing_in_input_order(db_session):
+    existing = crud.create_job(
+        db_session,
+        schemas.JobCreate(title="Existing", company="Acme", location="Remote", job_board_id="acme-1"),
+    )
+    payload = [
+        schemas.JobCreate(title="New A", company="Globex", location="Remote", job_board_id="globex-1"),
+        schemas.JobCreate(title="Existing again", company="Acme", location="Remote", job_board_id="acme-1"),
+        schemas.JobCreate(title="No board id", company="Initech", location="Austin"),
+        schemas.JobCreate(title="New A again", company="Globex", location="Remote", job_board_id="globex-1"),
+    ]
+
+    results = crud.create_jobs_batch(db_session, payload)
+
+    assert [job.title for job in results] == ["New A", "Existing", "No board id", "New A"]
+    assert results[1].id == existing.id
+    assert results[3].id == results[0].id
+    assert results[0].created_at is not None
+    assert len(crud.get_jobs(db_session)) == 3
+
+
+def test_status_counts_follow_create_update_delete_and_batch(db_session):
+    first = crud.create_job(
+        db_session,
+        schemas.JobCreate(title="A", company="Acme", location="Remote", job_board_id="s-1"),
+    )
+    crud.create_jobs_batch(
+        db_session,
+        [
+            schemas.JobCreate(title="B", company="Acme", location="Remote", status="Interview"),
+            schemas.JobCreate(title="C", company="Acme", location="Remote", status="Interview"),
+            schemas.JobCreate(title="A", company="Acme", location="Remote", job_board_id="s-1"),
+        ],
+    )
+    crud.update_job(db_session, first.id, schemas.JobUpdate(status="Rejected"))
+    interview = crud.get_jobs_by_filters(db_session, status="Interview")[0]
+    crud.delete_job(db_session, interview.id)
+
+    stats = crud.get_job_stats(db_session)
+
+    assert stats.total == 2
+    assert stats.by_status == {"Interview": 1, "Rejected": 1}
+
+
+def test_bulk_update_and_delete_keep_counts_and_search_index(db_session):
+    crud.create_jobs_batch(
+        db_session,
+        [
+            schemas.JobCreate(title=f"Engineer {i}", company="Acme", location="Remote", status=status)
+            for i, status in enumerate(["Applied", "Applied", "Interview", None])
+        ]
+        + [schemas.JobCreate(title="Designer", company="Globex", location="Remote")],
+    )
+    version = crud.get_data_version(db_session)
+
+    updated = crud.bulk_update_jobs(
+        db_session,
+        schemas.JobSelection(q="engineer"),
+        schemas.JobUpdate(status="Rejected", title="Closed role"),
+    )
+    deleted = crud.bulk_delete_jobs(
+        db_session, schemas.JobSelection(ids=[1, 2, 5], status="Rejected")
+    )
+
+    assert updated == 4
+    assert deleted == 2
+    assert crud.get_data_version(db_session) == version + 2
+    assert crud.get_job_stats(db_session).by_status == {"Applied": 1, "Rejected": 2}
+    assert [job.id for job in crud.get_jobs_by_filters(db_session, q="closed")] == [3, 4]
+    assert crud.get_jobs_by_filters(db_session, q="engineer") == []
+    assert crud.bulk_delete_jobs(db_session, schemas.JobSelection(ids=[1])) == 0
+    assert crud.get_data_version(db_session) == version + 2
+
+
+def test_upsert_jobs_applies_merge_policy_per_column(db_session):
+    crud.create_job(
+        db_session,
+        schemas.JobCreate(
+            title="Engineer", company="Acme", location="Remote", job_board_id="u-1", notes="Mine"
+        ),
+    )
+    policy = crud.parse_merge_policy("fill_missing,location:overwrite")
+
+    results = crud.upsert_jobs(
+        db_session,
+        [
+            schemas.JobCreate(
+                title="Senior Engineer", company="Acme", location="NYC", job_board_id="u-1",
+                notes="Theirs", source="Board",
+            ),
+            schemas.JobCreate(title="No key", company="Acme", location="Remote"),
+            schemas.JobCreate(title="Dup", company="Acme", location="Remote", job_board_id="u-2"),
+            schemas.JobCreate(title="Dup last", company="Acme", location="Remote", job_board_id="u-2"),
+        ],
+        policy,
+    )
+    again = crud.upsert_jobs(
+        db_session,
+        [schemas.JobCreate(title="Engineer", company="Acme", location="NYC", job_board_id="u-1")],
+        policy,
+    )
+    job = crud.get_job_by_id(db_session, results[0].id)
+
+    assert [r.result for r in results] == ["updated", "inserted", "inserted", "inserted"]
+    assert results[2].id == results[3].id
+    assert (job.title, job.location, job.notes, job.source) == ("Engineer", "NYC", "Mine", "Board")
+    assert job.status == "Applied"
+    assert [r.result for r in again] == ["unchanged"]
+    assert crud.get_job_by_id(db_session, results[2].id).title == "Dup last"
+    assert crud.get_job_stats(db_session).total == 3
+    with pytest.raises(crud.InvalidMergePolicyError):
+        crud.parse_merge_policy("salary:keep")
+
+
+def test_change_feed_tracks_batch_upsert_and_bulk_writes(db_session):
+    crud.create_jobs_batch(
+        db_session,
+        [schemas.JobCreate(title=f"Job {i}", company="Acme", location="Remote") for i in range(3)],
+    )
+    seq, changed, deleted = crud.get_job_changes(db_session, 0)
+    changed_ids = [job.id for job in changed]
+
+    crud.bulk_update_jobs(db_session, schemas.JobSelection(ids=[1]), schemas.JobUpdate(notes="x"))
+    crud.bulk_delete_jobs(db_session, schemas.JobSelection(ids=[2]))
+    crud.upsert_jobs(
+        db_session, [schemas.JobCreate(title="New", company="Acme", location="Remote", job_board_id="f-1")]
+    )
+    next_seq, delta, tombstones = crud.get_job_changes(db_session, seq, ["id", "notes"])
+
+    assert changed_ids == [1, 2, 3]
+    assert deleted == []
+    assert [tuple(row) for row in delta] == [(1, "x"), (4, None)]
+    assert tombstones == [2]
+    assert next_seq == crud.get_data_version(db_session)
+    assert crud.get_job_changes(db_session, next_seq)[1:] == ([], [])
+
+
+def test_ensure_change_log_backfills_existing_jobs(db_session):
+    db_session.add_all([models.Job(title="Old", company="Acme", location="Remote") for _ in range(2)])
+    db_session.commit()
+
+    crud.ensure_change_log(db_session)
+    seq, changed, _ = crud.get_job_changes(db_session, 0)
+
+    assert seq >= 1
+    assert [job.title for job in changed] == ["Old", "Old"]
+
+
+def test_upsert_status_overwrite_adjusts_counts_without_recount(db_session, monkeypatch):
+    crud.upsert_jobs(
+        db_session,
+        [
+            schemas.JobCreate(title=f"Job {i}", company="Acme", location="Remote", job_board_id=f"s-{i}")
+            for i in range(3)
+        ],
+    )
+    monkeypatch.setattr(crud, "_recount_status_counts", lambda db: pytest.fail("full recount"))
+
+    crud.upsert_jobs(
+        db_session,
+        [
+            schemas.JobCreate(title="Job 0", company="Acme", location="Remote", job_board_id="s-0", status="Interview"),
+            schemas.JobCreate(title="Job 1", company="Acme", location="Remote", job_board_id="s-1", status="Applied"),
+            schemas.JobCreate(title="Job 3", company="Acme", location="Remote", job_board_id="s-3", status="Rejected"),
+        ],
+    )
+    stats = crud.get_job_stats(db_session)
+
+    assert stats.total == 4
+    assert stats.by_status == {"Applied": 2, "Interview": 1, "Rejected": 1}
+    monkeypatch.undo()
+    crud.rebuild_status_counts(db_session)
+    assert crud.get_job_stats(db_session) == stats
+
+
+def test_rebuild_status_counts_matches_group_by(db_session):
+    db_session.add_all(
+        [
+            models.Job(title="A", company="Acme", location="Remote", status="Applied"),
+            models.Job(title="B", company="Acme", location="Remote", status=None),
+        ]
+    )
+    db_session.commit()
+
+    crud.ensure_status_counts(db_session)
+    stats = crud.get_job_stats(db_session)
+
+    assert stats.total == 2
+    assert stats.by_status == {"Applied": 1}
+
+
+def test_get_jobs_page_walks_all_rows_with_nulls_and_ties(db_session):
+    applied_dates = [date(2025, 9, 25), None, date(2025, 9, 27), date(2025, 9, 25), None]
+    crud.create_jobs_batch(
+        db_session,
+        [
+            schemas.JobCreate(title=f"Job {i}", company="Acme", location="Remote", applied_date=d)
+            for i, d in enumerate(applied_dates)
+        ],
+    )
+
+    for sort_desc in (False, True):
+        seen, cursor = [], ""
+        while cursor is not None:
+            page, cursor = crud.get_jobs_page(
+                db_session, cursor=cursor, limit=2, sort_by="applied_date", sort_desc=sort_desc
+            )
+            seen.extend(job.title for job in page)
+
+        expected = sorted(
+            enumerate(applied_dates),
+            key=lambda item: (item[1] is not None, item[1] or date.min, item[0]),
+            reverse=sort_desc,
+        )
+        assert seen == [f"Job {i}" for i, _ in expected]
+
+
+def test_get_jobs_page_rejects_cursor_for_other_sort(db_session):
+    cursor = crud.encode_cursor("applied_date", True, None, 1)
+
+    with pytest.raises(crud.InvalidCursorError):
+        crud.get_jobs_page(db_session, cursor=cursor, sort_by="company", sort_desc=True)
+    #id is never null; a crafted null would leave no segment to seek in
+    with pytest.raises(crud.InvalidCursorError):
+        crud.get_jobs_page(db_session, cursor=crud.encode_cursor("id", False, None, 1))
+
+
+def test_full_text_search_ranks_and_tracks_updates(db_session):
+    backend, frontend = crud.create_jobs_batch(
+        db_session,
+        [
+            schemas.JobCreate(
+                title="Backend Engineer",
+                company="Stripe",
+                location="Remote",
+                job_description="Payments platform in Go",
+            ),
+            schemas.JobCreate(
+                title="Frontend Engineer",
+                company="Acme",
+                location="Remote",
+                notes="Team also works on backend services",
+            ),
+        ],
+    )
+
+    ranked = crud.get_jobs_by_filters(db_session, q="backend")
+    prefix = crud.get_jobs_by_filters(db_session, q="pay")
+    crud.update_job(db_session, frontend.id, schemas.JobUpdate(notes="Payroll tooling"))
+    after_update = crud.get_jobs_by_filters(db_session, q="pay", sort_by="id", sort_desc=False)
+    crud.delete_job(db_session, backend.id)
+    after_delete = crud.get_jobs_by_filters(db_session, q="backend")
+
+    assert [job.id for job in ranked] == [backend.id, frontend.id]
+    assert [job.id for job in prefix] == [backend.id]
+    assert [job.id for job in after_update] == [backend.id, frontend.id]
+    assert after_delete == []
+
+
+def test_create_db_engine_applies_sqlite_profile(tmp_path):
+    settings = DatabaseSettings(url=f"sqlite:///{tmp_path / 'jobs.db'}", pool_size=2, sqlite_profile="wal")
+    engine = create_db_engine(settings)
+
+    with engine.connect() as connection:
+        journal_mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+        synchronous = connection.exec_driver_sql("PRAGMA synchronous").scalar()
+        busy_timeout = connection.exec_driver_sql("PRAGMA busy_timeout").scalar()
+
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
+    assert busy_timeout == 5000
+    assert engine.pool.size() == 2
+    engine.dispose()
+
+
+def test_database_settings_read_environment(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:////tmp/other.db")
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("SQLITE_PROFILE", "legacy")
+
+    settings = DatabaseSettings.from_env()
+
+    assert settings == DatabaseSettings(
+        url="sqlite:////tmp/other.db", pool_size=3, max_overflow=10, sqlite_profile="legacy"
+    )
+    with pytest.raises(ValueError, match="Unknown SQLITE_PROFILE"):
+        create_db_engine(DatabaseSettings(sqlite_profile="turbo"))
+
+
+def test_async_database_url_swaps_in_async_driver():
+    assert async_database_url("sqlite:///./jobs.db") == "sqlite+aiosqlite:///./jobs.db"
+    assert (
+        async_database_url("postgresql://user:pw@db/jobs")
+        == "postgresql+asyncpg://user:pw@db/jobs"
+    )
+
+
+def test_job_description_is_deferred_unless_requested(db_session):
+    crud.create_job(
+        db_session,
+        schemas.JobCreate(title="A", company="Acme", location="Remote", job_description="Long text"),
+    )
+    db_session.expunge_all()
+
+    plain = db_session.query(models.Job).one()
+    assert "job_description" not in plain.__dict__
+    db_session.expunge_all()
+
+    full = crud.get_jobs(db_session)[0]
+    sparse = crud.get_jobs(db_session, fields=["title"])[0]
+
+    assert full.__dict__["job_description"] == "Long text"
+    assert sparse._fields == ("title", "id")
+
+
+def test_find_duplicates_compares_jobs_within_normalized_blocks(db_session):
+    def add(title, company, location, job_link=None):
+        job = schemas.JobCreate(title=title, company=company, location=location, job_link=job_link)
+        return crud.create_job(db_session, job).id
+
+    original = add("Senior Software Engineer", "Acme Inc.", "San Francisco, CA", "https://www.acme.com/jobs/1?utm_source=x")
+    abbreviated = add("Sr. Software Engineer", "ACME", "San Francisco")
+    same_link = add("Product Manager", "Acme LLC", "Remote", "http://acme.com/jobs/1/")
+    add("Senior Software Engineer", "Globex", "San Francisco, CA")
+    elsewhere = add("Senior Software Engineer", "Acme", "New York, NY")
+
+    pairs = crud.find_duplicates(db_session)
+
+    assert [(p.id, p.duplicate_of, p.reason) for p in pairs] == [
+        (abbreviated, original, "title"),
+        (same_link, original, "link"),
+    ]
+    assert pairs[0].score == 1.0
+
+    #Keys follow updates, so the moved job joins the pair
+    crud.update_job(db_session, elsewhere, schemas.JobUpdate(location="San Francisco"))
+    assert {(p.id, p.duplicate_of) for p in crud.find_duplicates(db_session)} >= {
+        (elsewhere, original),
+        (elsewhere, abbreviated),
+    }
+
+
+def test_add_missing_columns_and_backfill_dedup_keys(db_session, tmp_path):
+    engine = create_db_engine(DatabaseSettings(url=f"sqlite:///{tmp_path / 'old.db'}"))
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE jobs (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL)")
+        added = add_missing_columns(connection, models.Job.__table__)
+        assert "company_key" in added and "title" not in added
+        assert add_missing_columns(connection, models.Job.__table__) == []
+    engine.dispose()
+
+    #Rows written before the key columns existed
+    db_session.execute(
+        insert(models.Job),
+        [{"title": "SWE", "company": "The Initech Corp", "location": "Austin, TX", "job_link": "initech.com/careers/7"}],
+    )
+    db_session.commit()
+    stored = db_session.query(models.Job).one()
+    updated_at = stored.updated_at
+    assert stored.company_key is None
+
+    crud.ensure_dedup_keys(db_session)
+    db_session.refresh(stored)
+
+    assert (stored.company_key, stored.title_key, stored.location_key, stored.link_key) == (
+        "initech", "engineer software", "austin tx", "initech.com/careers/7"
+    )
+    assert stored.updated_at == updated_at
+
+
+def test_rebuild_with_autoincrement_keeps_rows_and_never_reuses_ids(tmp_path):
+    engine = create_db_engine(DatabaseSettings(url=f"sqlite:///{tmp_path / 'old.db'}"))
+    jobs = models.Job.__table__
+    with engine.begin() as connection:
+        #jobs as created before AUTOINCREMENT, with the search index on top
+        connection.exec_driver_sql(str(CreateTable(jobs).compile(engine)).replace(" AUTOINCREMENT", ""))
+        models.JobArchive.__table__.create(connection)
+        install_search_index(connection)
+        connection.execute(insert(jobs), [
+            {"id": 1, "title": "Backend Engineer", "company": "Stripe", "location": "Remote"},
+            {"id": 2, "title": "Data Engineer", "company": "Acme", "location": "Austin"},
+        ])
+        connection.execute(insert(models.JobArchive), [{
+            "id": 5, "title": "QA", "company": "Acme", "location": "Austin",
+            "created_at": datetime.now(timezone.utc), "updated_at": datetime.now(timezone.utc),
+            "archived_at": datetime.now(timezone.utc),
+        }])
+
+        assert rebuild_with_autoincrement(connection, jobs, [models.JobArchive.id])
+        assert not rebuild_with_autoincrement(connection, jobs, [models.JobArchive.id])
+        install_search_index(connection)
+        connection.execute(jobs.delete().where(jobs.c.id == 2))
+        new_id = connection.execute(
+            insert(jobs).values(title="Frontend Engineer", company="Acme", location="Remote")
+        ).inserted_primary_key[0]
+        matches = connection.execute(
+            text("SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH 'engineer' ORDER BY rowid")
+        ).scalars().all()
+        indexes = {index["name"] for index in inspect(connection).get_indexes("jobs")}
+
+    engine.dispose()
+    assert new_id == 6
+    assert matches == [1, 6]
+    assert {index.name for index in jobs.indexes} <= indexes
+
+
+def test_status_history_feeds_incremental_funnel_rollups(db_session):
+    jobs = crud.create_jobs_batch(
+        db_session,
+        [schemas.JobCreate(title=f"Job {i}", company="Acme", location="Remote", status="Applied") for i in range(4)],
+    )
+    first, second, third, _ = [job.id for job in jobs]
+    crud.bulk_update_jobs(
+        db_session, schemas.JobSelection(ids=[first, second]), schemas.JobUpdate(status="Interview")
+    )
+    crud.update_job(db_session, first, schemas.JobUpdate(status="Offer"))
+    crud.update_job(db_session, first, schemas.JobUpdate(status="Offer", notes="same status"))
+    crud.update_job(db_session, third, schemas.JobUpdate(status="Rejected"))
+
+    history = db_session.query(models.JobStatusEvent).filter_by(job_id=first).order_by(models.JobStatusEvent.id)
+    assert [(e.from_status, e.status) for e in history] == [
+        (None, "Applied"), ("Applied", "Interview"), ("Interview", "Offer")
+    ]
+
+    funnel = crud.get_status_funnel(db_session)
+    stages = {stage.status: stage for stage in funnel.stages}
+    assert [stage.status for stage in funnel.stages] == ["Applied", "Interview", "Offer", "Rejected"]
+    assert (stages["Applied"].entered, stages["Applied"].exited) == (4, 3)
+    assert [(t.status, t.count, t.conversion) for t in stages["Applied"].next] == [
+        ("Interview", 2, 0.5), ("Rejected", 1, 0.25)
+    ]
+    assert [(t.status, t.conversion) for t in stages["Interview"].next] == [("Offer", 0.5)]
+    assert stages["Applied"].median_dwell_hours == 0
+    assert stages["Offer"].median_dwell_hours is None
+
+    #The incremental rollups match a full replay of the history
+    crud.rebuild_status_funnel(db_session)
+    assert crud.get_status_funnel(db_session) == funnel
+
+    #Backdate when the jobs entered Applied: dwell 48h, 10h and 30h
+    for job_id, hours in ((first, 48), (second, 10), (third, 30)):
+        event = db_session.query(models.JobStatusEvent).filter_by(job_id=job_id, from_status=None).one()
+        event.occurred_at -= timedelta(hours=hours)
+    db_session.commit()
+    crud.rebuild_status_funnel(db_session)
+
+    stages = {stage.status: stage for stage in crud.get_status_funnel(db_session).stages}
+    assert stages["Applied"].median_dwell_hours == 30
+
+
+def test_ensure_status_history_seeds_current_statuses(db_session):
+    for status in ("Applied", "Applied", None):
+        crud.create_job(db_session, schemas.JobCreate(title="A", company="Acme", location="Remote", status=status))
+    db_session.query(models.JobStatusEvent).delete()
+    db_session.commit()
+
+    crud.ensure_status_history(db_session)
+
+    assert db_session.query(models.JobStatusEvent).count() == 3
+    funnel = crud.get_status_funnel(db_session)
+    assert [(stage.status, stage.entered) for stage in funnel.stages] == [("Applied", 2)]
+
+
+def test_activity_rollups_track_every_write_path(db_session):
+    def rollup():
+        return {
+            (row.granularity, row.bucket, row.source, row.status): row.count
+            for row in db_session.query(models.JobActivityCount).filter(models.JobActivityCount.count != 0)
+        }
+
+    def job(applied_date, **overrides):
+        fields = {"title": "A", "company": "Acme", "location": "Remote", "source": "LinkedIn", **overrides}
+        return schemas.JobCreate(applied_date=applied_date, **fields)
+
+    created = crud.create_job(db_session, job(date(2025, 3, 5)))
+    batch = crud.create_jobs_batch(db_session, [job(date(2025, 3, 6)), job(date(2025, 4, 1)), job(None)])
+    crud.upsert_jobs(db_session, [job(date(2025, 3, 7), job_board_id="b-1"), job(date(2025, 3, 7), job_board_id="b-2")])
+    crud.upsert_jobs(
+        db_session, [job(date(2025, 2, 1), job_board_id="b-1", source="Referral", status="Interview")]
+    )
+    crud.update_job(db_session, created.id, schemas.JobUpdate(status="Rejected"))
+    crud.bulk_update_jobs(
+        db_session, schemas.JobSelection(status="Applied"), schemas.JobUpdate(applied_date=date(2025, 3, 10))
+    )
+    crud.delete_job(db_session, batch[1].id)
+    crud.bulk_delete_jobs(db_session, schemas.JobSelection(ids=[batch[0].id]))
+
+    incremental = rollup()
+    crud.rebuild_activity_counts(db_session)
+    assert rollup() == incremental
+
+    weekly = crud.get_job_timeseries(db_session, "week", date(2025, 1, 1), date(2025, 4, 30))
+    assert [(p.bucket, p.applications, p.responses, p.by_status) for p in weekly.points] == [
+        (date(2025, 1, 27), 1, 1, {"Interview": 1}),
+        (date(2025, 3, 3), 1, 1, {"Rejected": 1}),
+        (date(2025, 3, 10), 2, 0, {"Applied": 2}),
+    ]
+    monthly = crud.get_job_timeseries(db_session, "month", date(2025, 3, 20), date(2025, 3, 31), by_source=True)
+    assert [(p.bucket, p.source, p.applications) for p in monthly.points] == [(date(2025, 3, 1), "LinkedIn", 3)]
+    assert crud.shift_buckets(date(2025, 1, 1), "month", -11) == date(2024, 2, 1)
+
+
+def test_archive_jobs_moves_old_closed_jobs_in_batches(db_session):
+    jobs = [job.id for job in crud.create_jobs_batch(
+        db_session,
+        [
+            schemas.JobCreate(title=f"Job {i}", company="Acme", location="Remote", status=status, job_description="text")
+            for i, status in enumerate(["Rejected", "Withdrawn", "Rejected", "Applied", "Rejected"])
+        ],
+    )]
+    recent = jobs[4]
+    db_session.query(models.Job).filter(models.Job.id != recent).update(
+        {"updated_at": datetime(2020, 1, 1, tzinfo=timezone.utc)}, synchronize_session=False
+    )
+    db_session.commit()
+    stats = crud.get_job_stats(db_session)
+    version = crud.get_data_version(db_session)
+    cutoff = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+    assert crud.archive_jobs(db_session, cutoff, limit=2) == 2
+    assert crud.archive_jobs(db_session, cutoff, limit=2) == 1
+    assert crud.archive_jobs(db_session, cutoff, limit=2) == 0
+
+    archived = db_session.query(models.JobArchive).order_by(models.JobArchive.id).all()
+    assert [job.id for job in archived] == jobs[:3]
+    assert archived[0].job_description == "text"
+    assert {job.id for job in crud.get_jobs(db_session)} == {jobs[3], recent}
+    #Still counted; gone from the change feed
+    assert crud.get_job_stats(db_session) == stats
+    _, _, deleted = crud.get_job_changes(db_session, version)
+    assert sorted(deleted) == jobs[:3]
+
+    crud.rebuild_status_counts(db_session)
+    assert crud.get_job_stats(db_session) == stats
+
+    both = crud.get_jobs_by_filters(
+        db_session, status="r", sort_by="id", sort_desc=False, fields=["title"], include_archived=True
+    )
+    assert [row.title for row in both] == ["Job 0", "Job 1", "Job 2", "Job 4"]
@@ -1,11 +1,19 @@
 import base64
+import email
 import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from http import HTTPStatus
 from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
 
+import httplib2
 import pytest
+from googleapiclient.discovery import build
 
-from backend.app.services import gmail_client
+from backend.app.services import gmail_client, gmail_quota
 
 
 class FakeCredentials:
@@ -42,6 +50,13 @@ class FakeCredentials:
         )
 
 
+@pytest.fixture(autouse=True)
+def clear_gmail_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    gmail_client.clear_credentials_cache()
+    monkeypatch.setattr(gmail_quota, "limiter", gmail_quota.TokenBucket(rate=1e9, capacity=1e9))
+    monkeypatch.setattr(gmail_quota, "stats", gmail_quota.FetchStats())
+
+
 def test_load_credentials_returns_none_when_token_file_missing(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
     monkeypatch.setattr(gmail_client, "TOKEN_PATH", tmp_path / "missing.json")
 
@@ -210,8 +225,8 @@ def test_fetch_job_applications_from_gmail_filters_non_job_emails(monkeypatch: p
         "1": {"payload": {"headers": []}, "snippet": ""},
         "2": {"payload": {"headers": []}, "snippet": ""},
     }
-    monkeypatch.setattr(gmail_client, "list_message_ids", lambda q, max_results: ["1", "2"])
-    monkeypatch.setattr(gmail_client, "get_message", lambda msg_id: messages[msg_id])
+    monkeypatch.setattr(gmail_client, "iter_message_ids", lambda q, limit: iter(["1", "2"]))
+    monkeypatch.setattr(gmail_client, "get_messages", lambda ids, batch_size, require_all: {i: messages[i] for i in ids})
     monkeypatch.setattr(gmail_client, "is_job_application_email", lambda msg: msg is messages["1"])
     monkeypatch.setattr(
         gmail_client,
@@ -222,3 +237,455 @@ def test_fetch_job_applications_from_gmail_filters_non_job_emails(monkeypatch: p
     jobs = gmail_client.fetch_job_applications_from_gmail("applied", 10)
 
     assert jobs == [{"subject": "Matched", "from": "recruiter@company.com"}]
+
+
+def test_get_message_reads_token_and_builds_client_once(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(gmail_client, "TOKEN_PATH", tmp_path / "gmail_token.json")
+    loads: list[int] = []
+    builds: list[object] = []
+
+    class FakeMessagesApi:
+        def get(self, **kwargs: str) -> "FakeMessagesApi":
+            self.msg_id = kwargs["id"]
+            return self
+
+        def execute(self) -> dict[str, str]:
+            return {"id": self.msg_id}
+
+    class FakeService:
+        def users(self) -> "FakeService":
+            return self
+
+        def messages(self) -> FakeMessagesApi:
+            return FakeMessagesApi()
+
+    def load() -> FakeCredentials:
+        loads.append(1)
+        return FakeCredentials()
+
+    def build(creds: object) -> FakeService:
+        builds.append(creds)
+        return FakeService()
+
+    monkeypatch.setattr(gmail_client, "load_credentials", load)
+    monkeypatch.setattr(gmail_client, "_build_gmail_service", build)
+
+    assert [gmail_client.get_message(str(i))["id"] for i in range(200)] == [str(i) for i in range(200)]
+    assert len(loads) == 1
+    assert len(builds) == 1
+
+    #A token written by another process is picked up
+    (tmp_path / "gmail_token.json").write_text("{}")
+    gmail_client.get_message("x")
+    assert len(loads) == 2
+
+
+def test_get_valid_credentials_refreshes_once_before_expiry(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(gmail_client, "TOKEN_PATH", tmp_path / "gmail_token.json")
+    monkeypatch.setattr(gmail_client, "_request_class", lambda: (lambda: object()))
+    creds = FakeCredentials()
+    creds.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=2)
+    refreshes: list[int] = []
+
+    def refresh(_request: object) -> None:
+        refreshes.append(1)
+        creds.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+        creds.token = "refreshed-token"
+
+    creds.refresh = refresh
+    monkeypatch.setattr(gmail_client, "load_credentials", lambda: creds)
+
+    threads = [threading.Thread(target=gmail_client.get_valid_credentials) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert refreshes == [1]
+    assert json.loads((tmp_path / "gmail_token.json").read_text())["token"] == "refreshed-token"
+
+
+def test_save_credentials_replaces_token_atomically(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    token_path = tmp_path / "gmail_token.json"
+    token_path.write_text('{"token": "old"}')
+    monkeypatch.setattr(gmail_client, "TOKEN_PATH", token_path)
+
+    def fail(*_args: object) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(gmail_client.os, "replace", fail)
+    with pytest.raises(OSError):
+        gmail_client._save_credentials(FakeCredentials(token="new"))
+
+    assert json.loads(token_path.read_text()) == {"token": "old"}
+    assert list(tmp_path.iterdir()) == [token_path]
+
+    monkeypatch.undo()
+    monkeypatch.setattr(gmail_client, "TOKEN_PATH", token_path)
+    gmail_client._save_credentials(FakeCredentials(token="new"))
+
+    assert json.loads(token_path.read_text())["token"] == "new"
+    assert list(tmp_path.iterdir()) == [token_path]
+
+
+class FakeGmailHttp:
+    """
+    Local stand-in for Gmail's HTTP endpoint, passed to the API client as its
+    transport. Serves messages.get singly or as multipart batches, plus
+    messages.list, getProfile and history.list over a small mailbox; counts
+    round trips and sleeps `latency` seconds in each.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        failures: Optional[dict[str, list[int]]] = None,
+        batch_failures: Optional[list[int]] = None,
+    ) -> None:
+        self.latency = latency
+        # Message id -> statuses to answer with before it succeeds
+        self.failures = failures or {}
+        # Statuses for whole batch requests, before batches succeed
+        self.batch_failures = batch_failures or []
+        self.requests = 0
+        self.batch_sizes: list[int] = []
+        self._lock = threading.Lock()
+        # Ids messages.list returns, and history: the current historyId,
+        # (id, labels) added since, and the oldest id history.list accepts
+        self.mailbox: list[str] = []
+        # Search queries messages.list was called with; a query containing
+        # "after:" only matches `recent`
+        self.queries: list[str] = []
+        self.recent: list[str] = []
+        self.history_id = 100
+        self.added: list[tuple[str, list[str]]] = []
+        self.oldest_history_id = 0
+
+    def request(self, uri: str, method: str = "GET", body: Optional[str] = None, headers: Optional[dict] = None, **_: object):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        if urlsplit(uri).path == "/batch":
+            with self._lock:
+                status = self.batch_failures.pop(0) if self.batch_failures else None
+            if status is not None:
+                content = json.dumps({"error": {"code": status, "message": HTTPStatus(status).phrase}})
+                return httplib2.Response({"status": status, "content-type": "application/json"}), content.encode()
+            return self._batch(body or "", (headers or {})["content-type"])
+        status, content = self._get(uri)
+        return httplib2.Response({"status": status, "content-type": "application/json"}), content.encode()
+
+    def _get(self, uri: str) -> tuple[int, str]:
+        parts = urlsplit(uri)
+        params = dict(parse_qsl(parts.query))
+        if parts.path.endswith("/profile"):
+            return 200, json.dumps({"emailAddress": "me@example.com", "historyId": str(self.history_id)})
+        if parts.path.endswith("/messages"):
+            self.queries.append(params.get("q", ""))
+            matches = self.recent if "after:" in params.get("q", "") else self.mailbox
+            return 200, json.dumps({"messages": [{"id": msg_id} for msg_id in matches]})
+        if parts.path.endswith("/history"):
+            if int(params["startHistoryId"]) < self.oldest_history_id:
+                return 404, json.dumps({"error": {"code": 404, "message": "Requested entity was not found."}})
+            start, size = int(params.get("pageToken", 0)), int(params["maxResults"])
+            res: dict[str, object] = {
+                "historyId": str(self.history_id),
+                "history": [
+                    {"messagesAdded": [{"message": {"id": msg_id, "labelIds": labels}}]}
+                    for msg_id, labels in self.added[start:start + size]
+                ],
+            }
+            if start + size < len(self.added):
+                res["nextPageToken"] = str(start + size)
+            return 200, json.dumps(res)
+        return self._message(uri)
+
+    def _message(self, uri: str) -> tuple[int, str]:
+        msg_id = urlsplit(uri).path.rsplit("/", 1)[-1]
+        with self._lock:
+            status = self.failures[msg_id].pop(0) if self.failures.get(msg_id) else None
+        if status is not None:
+            return status, json.dumps({"error": {"code": status, "message": HTTPStatus(status).phrase}})
+        return 200, json.dumps({"id": msg_id, "snippet": f"message {msg_id}"})
+
+    def _batch(self, body: str, content_type: str):
+        parts = email.message_from_string(f"Content-Type: {content_type}\r\n\r\n{body}").get_payload()
+        with self._lock:
+            self.batch_sizes.append(len(parts))
+        boundary = "fake-gmail-batch"
+        out = []
+        for part in parts:
+            _method, uri, _version = part.get_payload().split("\n", 1)[0].strip().split(" ")
+            status, content = self._message(uri)
+            out.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'][1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: application/json\r\n\r\n{content}\r\n"
+            )
+        out.append(f"--{boundary}--")
+        response = httplib2.Response({"status": 200, "content-type": f"multipart/mixed; boundary={boundary}"})
+        return response, "".join(out).encode()
+
+
+def _use_fake_gmail(monkeypatch: pytest.MonkeyPatch, http: FakeGmailHttp) -> None:
+    creds = FakeCredentials()
+    monkeypatch.setattr(gmail_client, "get_valid_credentials", lambda: creds)
+    monkeypatch.setattr(
+        gmail_client, "_build_gmail_service", lambda _creds: build("gmail", "v1", http=http, static_discovery=True)
+    )
+
+
+def test_get_messages_batches_round_trips(monkeypatch: pytest.MonkeyPatch) -> None:
+    http = FakeGmailHttp()
+    _use_fake_gmail(monkeypatch, http)
+    ids = [f"m{i}" for i in range(200)]
+
+    one_by_one = [gmail_client.get_message(msg_id) for msg_id in ids]
+    assert http.requests == 200
+
+    http.requests = 0
+    batched = gmail_client.get_messages(ids, batch_size=100)
+
+    assert list(batched.values()) == one_by_one
+    assert http.requests == 2
+    assert sorted(http.batch_sizes) == [100, 100]
+
+
+def test_get_messages_retries_only_failed_items(monkeypatch: pytest.MonkeyPatch) -> None:
+    http = FakeGmailHttp(failures={"m3": [503, 429], "m5": [404]})
+    _use_fake_gmail(monkeypatch, http)
+    monkeypatch.setattr(gmail_client, "RETRY_DELAY", 0)
+    ids = [f"m{i}" for i in range(10)]
+
+    messages = gmail_client.get_messages(ids, batch_size=4)
+
+    #m3 succeeds on its third attempt, the deleted m5 is skipped
+    assert list(messages) == [msg_id for msg_id in ids if msg_id != "m5"]
+    assert sorted(http.batch_sizes) == [1, 1, 2, 4, 4]
+    assert gmail_quota.stats.snapshot()["retries"] == 2
+
+    with pytest.raises(ValueError):
+        gmail_client.get_messages(ids, batch_size=101)
+
+
+def test_token_bucket_paces_and_drains() -> None:
+    now = [0.0]
+
+    def sleep(seconds: float) -> None:
+        now[0] += seconds
+
+    bucket = gmail_quota.TokenBucket(rate=100, capacity=100, clock=lambda: now[0], sleep=sleep)
+
+    assert bucket.acquire(100) == 0
+    #Larger than the capacity: goes into debt and waits it off
+    assert bucket.acquire(250) == pytest.approx(2.5)
+    assert bucket.acquire(50) == pytest.approx(0.5)
+
+    now[0] += 10
+    bucket.drain()
+    assert bucket.acquire(10) == pytest.approx(0.1)
+
+
+def test_get_messages_stays_within_quota_rate(monkeypatch: pytest.MonkeyPatch) -> None:
+    http = FakeGmailHttp()
+    _use_fake_gmail(monkeypatch, http)
+    monkeypatch.setattr(gmail_quota, "limiter", gmail_quota.TokenBucket(rate=2000, capacity=500))
+    ids = [f"m{i}" for i in range(200)]
+
+    started = time.perf_counter()
+    messages = gmail_client.get_messages(ids, batch_size=25)
+    elapsed = time.perf_counter() - started
+
+    #1000 units: a 500 unit burst, then 500 more at 2000 units per second
+    assert len(messages) == 200
+    assert elapsed >= 0.24
+    stats = gmail_quota.stats.snapshot()
+    assert stats["quota_units"] == 1000
+    assert stats["requests"] == 8
+    assert stats["messages"] == 200
+
+
+def test_get_messages_backs_off_when_throttled(monkeypatch: pytest.MonkeyPatch) -> None:
+    http = FakeGmailHttp(batch_failures=[429], failures={"m1": [429]})
+    _use_fake_gmail(monkeypatch, http)
+    monkeypatch.setattr(gmail_client, "RETRY_DELAY", 0)
+
+    messages = gmail_client.get_messages([f"m{i}" for i in range(3)])
+
+    assert list(messages) == ["m0", "m1", "m2"]
+    stats = gmail_quota.stats.snapshot()
+    assert stats["throttled"] == 2
+    assert stats["failed"] == 0
+
+
+def test_execute_raises_rate_limited_after_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    http = FakeGmailHttp(failures={"m1": [429] * 4})
+    _use_fake_gmail(monkeypatch, http)
+    monkeypatch.setattr(gmail_client, "RETRY_DELAY", 0)
+
+    with pytest.raises(gmail_client.GmailRateLimited):
+        gmail_client.get_message("m1")
+    assert http.requests == 4
+    assert gmail_quota.stats.snapshot()["throttled"] == 4
+
+
+def test_iter_message_ids_follows_page_tokens_lazily(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[dict[str, object]] = []
+    pages = {None: ("p2", ["1", "2", "3"]), "p2": ("p3", ["4", "5", "6"]), "p3": (None, ["7"])}
+
+    class FakeMessagesApi:
+        def list(self, **kwargs: object) -> "FakeMessagesApi":
+            calls.append(kwargs)
+            self.token = kwargs.get("pageToken")
+            return self
+
+        def execute(self) -> dict[str, object]:
+            next_token, ids = pages[self.token]
+            res: dict[str, object] = {"messages": [{"id": i} for i in ids]}
+            if next_token:
+                res["nextPageToken"] = next_token
+            return res
+
+    class FakeService:
+        def users(self) -> "FakeService":
+            return self
+
+        def messages(self) -> FakeMessagesApi:
+            return FakeMessagesApi()
+
+    monkeypatch.setattr(gmail_client, "get_valid_credentials", lambda: FakeCredentials())
+    monkeypatch.setattr(gmail_client, "_build_gmail_service", lambda creds: FakeService())
+
+    ids = gmail_client.iter_message_ids(q="label:inbox", page_size=3)
+    assert next(ids) == "1"
+    assert len(calls) == 1
+    assert list(ids) == ["2", "3", "4", "5", "6", "7"]
+    assert [call.get("pageToken") for call in calls] == [None, "p2", "p3"]
+
+    calls.clear()
+    assert gmail_client.list_message_ids(q="label:inbox", max_results=4) == ["1", "2", "3", "4"]
+    #The last page only asks for what is still needed
+    assert [call["maxResults"] for call in calls] == [4, 1]
+
+
+def test_iter_job_applications_streams_in_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    fetched: list[int] = []
+    listed: list[str] = []
+
+    def iter_ids(q: str, limit: Optional[int]):
+        for i in range(1000):
+            listed.append(str(i))
+            yield str(i)
+
+    def get_messages(ids: list[str], batch_size: int, require_all: bool) -> dict[str, dict]:
+        fetched.append(len(ids))
+        return {i: {"id": i} for i in ids}
+
+    monkeypatch.setattr(gmail_client, "iter_message_ids", iter_ids)
+    monkeypatch.setattr(gmail_client, "get_messages", get_messages)
+    monkeypatch.setattr(gmail_client, "FETCH_WORKERS", 2)
+    monkeypatch.setattr(gmail_client, "is_job_application_email", lambda msg: int(msg["id"]) % 10 == 0)
+    monkeypatch.setattr(gmail_client, "parse_job_candidates_from_message", lambda msg: [{"subject": msg["id"]}])
+
+    candidates = gmail_client.iter_job_applications_from_gmail("applied", batch_size=50)
+    assert next(candidates) == {"subject": "0"}
+    #Only the first chunk (one batch per worker) has been listed and fetched
+    assert len(listed) == 100
+    assert fetched == [100]
+    assert len(list(candidates)) == 99
+    assert fetched == [100] * 10
+
+
+def test_list_added_message_ids_pages_through_history(monkeypatch: pytest.MonkeyPatch) -> None:
+    http = FakeGmailHttp()
+    _use_fake_gmail(monkeypatch, http)
+    http.history_id = 150
+    http.added = [("m1", ["INBOX"]), ("m2", ["SPAM"]), ("m3", ["INBOX"]), ("m1", ["INBOX"]), ("m4", ["DRAFT"])]
+
+    assert gmail_client.list_added_message_ids("100", page_size=2) == (["m1", "m3"], "150")
+    assert http.requests == 3
+
+    http.oldest_history_id = 120
+    with pytest.raises(gmail_client.HistoryExpired):
+        gmail_client.list_added_message_ids("100")
+
+
+def test_sync_job_applications_uses_history_checkpoint(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(gmail_client, "SYNC_STATE_PATH", tmp_path / "gmail_sync.json")
+    monkeypatch.setattr(gmail_client, "is_job_application_email", lambda msg: True)
+    monkeypatch.setattr(gmail_client, "parse_job_candidates_from_message", lambda msg: [{"subject": msg["id"]}])
+    http = FakeGmailHttp()
+    _use_fake_gmail(monkeypatch, http)
+    http.mailbox = [f"m{i}" for i in range(120)]
+
+    first = gmail_client.sync_job_applications("applied")
+    assert first["mode"] == "full"
+    assert len(first["jobs"]) == 120
+    state = gmail_client.load_sync_state()
+    assert (state["history_id"], state["query"]) == ("100", "applied")
+
+    #Only added mail that the query matches is fetched: one history page,
+    #one search and one batch
+    http.requests = 0
+    http.history_id = 130
+    http.added = [("m120", ["INBOX"]), ("m121", ["INBOX"]), ("newsletter", ["INBOX"])]
+    http.recent = ["m121", "m120"]
+    second = gmail_client.sync_job_applications("applied")
+    assert second == {"mode": "incremental", "history_id": "130", "jobs": [{"subject": "m120"}, {"subject": "m121"}]}
+    assert http.requests == 3
+    assert http.queries[-1] == f"(applied) after:{state['synced_at'] - 86400}"
+
+    #An expired checkpoint or another query falls back to a full sync
+    http.oldest_history_id = 200
+    assert gmail_client.sync_job_applications("applied")["mode"] == "full"
+    http.oldest_history_id = 0
+    assert gmail_client.sync_job_applications("interview")["mode"] == "full"
+    assert gmail_client.load_sync_state()["query"] == "interview"
+
+
+def test_sync_job_applications_keeps_checkpoint_when_messages_fail(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(gmail_client, "SYNC_STATE_PATH", tmp_path / "gmail_sync.json")
+    monkeypatch.setattr(gmail_client, "RETRY_DELAY", 0)
+    monkeypatch.setattr(gmail_client, "is_job_application_email", lambda msg: True)
+    monkeypatch.setattr(gmail_client, "parse_job_candidates_from_message", lambda msg: [{"subject": msg["id"]}])
+    http = FakeGmailHttp()
+    _use_fake_gmail(monkeypatch, http)
+    gmail_client.sync_job_applications("applied")
+    state = gmail_client.load_sync_state()
+
+    http.history_id = 130
+    http.added = [("m1", ["INBOX"]), ("m2", ["INBOX"])]
+    http.recent = ["m1", "m2"]
+    http.failures = {"m2": [503] * 4}
+    with pytest.raises(gmail_client.GmailFetchIncomplete):
+        gmail_client.sync_job_applications("applied")
+    assert gmail_client.load_sync_state() == state
+
+    #The next sync starts from the same checkpoint and gets both messages
+    retried = gmail_client.sync_job_applications("applied")
+    assert retried["jobs"] == [{"subject": "m1"}, {"subject": "m2"}]
+    assert gmail_client.load_sync_state()["history_id"] == "130"
+
+
+def test_iter_message_ids_uses_the_resuming_threads_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    http = FakeGmailHttp()
+    _use_fake_gmail(monkeypatch, http)
+    built: list[str] = []
+    build_service = gmail_client._build_gmail_service
+    monkeypatch.setattr(
+        gmail_client,
+        "_build_gmail_service",
+        lambda creds: built.append(threading.current_thread().name) or build_service(creds),
+    )
+    pages = iter([{"messages": [{"id": "1"}], "nextPageToken": "p2"}, {"messages": [{"id": "2"}]}])
+    monkeypatch.setattr(gmail_client, "_execute", lambda request, method: next(pages))
+
+    ids = gmail_client.iter_message_ids()
+    assert next(ids) == "1"
+    resumed: list[str] = []
+    worker = threading.Thread(target=lambda: resumed.extend(ids), name="other")
+    worker.start()
+    worker.join()
+
+    assert resumed == ["2"]
+    assert built == [threading.current_thread().name, "other"]
@@ -1,4 +1,7 @@
+import json
+
 from backend.app.main import app
+from backend.app.services.gmail_client import GmailFetchIncomplete, GmailRateLimited
 
 
 def test_gmail_status_reports_missing_credentials(client, monkeypatch) -> None:
@@ -81,3 +84,91 @@ def test_get_jobs_from_gmail_handles_service_errors(client, monkeypatch) -> None
 
     assert response.status_code == 500
     assert response.json()["detail"] == "Failed to fetch Gmail jobs: boom"
+
+
+def test_get_jobs_from_gmail_reports_rate_limiting(client, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "backend.app.routers.gmail.fetch_job_applications_from_gmail",
+        lambda query, max_results: (_ for _ in ()).throw(GmailRateLimited("slow down")),
+    )
+
+    response = client.get("/gmail/jobs")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+
+
+def test_gmail_stats_reports_fetch_counters(client) -> None:
+    response = client.get("/gmail/stats")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert {"requests", "quota_units", "throttled", "retries", "messages_per_second", "quota_rate"} <= set(body)
+
+
+def test_stream_jobs_from_gmail_returns_ndjson(client, monkeypatch) -> None:
+    def candidates(query, max_results):
+        assert max_results is None
+        yield {"subject": "Applied", "from": "a@company.com"}
+        yield {"subject": "Interview", "from": "b@company.com"}
+
+    monkeypatch.setattr("backend.app.routers.gmail.iter_job_applications_from_gmail", candidates)
+    monkeypatch.setattr("backend.app.routers.gmail.get_valid_credentials", lambda: object())
+
+    response = client.get("/gmail/jobs/stream?query=applied")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["subject"] for line in response.text.splitlines()] == ["Applied", "Interview"]
+
+
+def test_sync_jobs_from_gmail_reports_mode(client, monkeypatch) -> None:
+    def sync(query, full):
+        assert full is True
+        return {"mode": "full", "history_id": "42", "jobs": [{"subject": "Applied", "from": "a@company.com"}]}
+
+    monkeypatch.setattr("backend.app.routers.gmail.sync_job_applications", sync)
+
+    response = client.post("/gmail/sync?full=true")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "mode": "full",
+        "history_id": "42",
+        "count": 1,
+        "jobs": [{"subject": "Applied", "from": "a@company.com"}],
+    }
+
+
+def test_sync_jobs_from_gmail_reports_incomplete_fetch(client, monkeypatch) -> None:
+    def sync(query, full):
+        raise GmailFetchIncomplete(["m1"])
+
+    monkeypatch.setattr("backend.app.routers.gmail.sync_job_applications", sync)
+
+    response = client.post("/gmail/sync")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "60"
+
+
+def test_stream_jobs_from_gmail_reports_errors_before_streaming(client, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "backend.app.routers.gmail.get_valid_credentials",
+        lambda: (_ for _ in ()).throw(RuntimeError("No credentials. Authorize first.")),
+    )
+
+    missing = client.get("/gmail/jobs/stream")
+
+    def throttled(query, max_results):
+        raise GmailRateLimited("slow down")
+        yield
+
+    monkeypatch.setattr("backend.app.routers.gmail.get_valid_credentials", lambda: object())
+    monkeypatch.setattr("backend.app.routers.gmail.iter_job_applications_from_gmail", throttled)
+
+    limited = client.get("/gmail/jobs/stream")
+
+    assert missing.status_code == 500
+    assert missing.json()["detail"] == "Failed to fetch Gmail jobs: No credentials. Authorize first."
+    assert limited.status_code == 429
@@ -1,3 +1,22 @@
+import asyncio
+import csv
+import io
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from backend.app.crud import crud
+from backend.app.routers import jobs as jobs_router
+from backend.app.schemas import schemas
+from backend.app.services import archival, dedup, follow_ups, job_events, job_import
+
+
 def create_job_payload(**overrides):
     payload = {
         "title": "Software Engineer",
@@ -207,3 +226,603 @@ def test_batch_jobs_creates_all_records(client):
     assert response.status_code == 200
     assert len(response.json()) == 4
     assert len(jobs.json()) == 4
+
+
+def test_batch_jobs_reuses_existing_duplicates(client):
+    first = client.post("/jobs/", json=create_job_payload(job_board_id="batch-dup"))
+
+    response = client.post(
+        "/jobs/batch",
+        json=[
+            create_job_payload(title="Fresh", company="Stripe", job_board_id="batch-new"),
+            create_job_payload(job_board_id="batch-dup"),
+        ],
+    )
+
+    assert response.status_code == 200
+    assert [job["title"] for job in response.json()] == ["Fresh", "Software Engineer"]
+    assert response.json()[1]["id"] == first.json()["id"]
+    assert len(client.get("/jobs/").json()) == 2
+
+
+def test_batch_jobs_resolves_job_board_id_reused_by_another_company(client):
+    first = client.post("/jobs/", json=create_job_payload(company="OpenAI", job_board_id="shared-1"))
+
+    response = client.post(
+        "/jobs/batch",
+        json=[
+            create_job_payload(company="Stripe", job_board_id="shared-1"),
+            create_job_payload(company="Plaid", job_board_id="shared-2"),
+            create_job_payload(company="Ramp", job_board_id="shared-2"),
+        ],
+    )
+
+    assert response.status_code == 200
+    ids = [job["id"] for job in response.json()]
+    assert ids[0] == first.json()["id"]
+    assert ids[1] == ids[2]
+    assert len(client.get("/jobs/").json()) == 2
+
+
+def test_import_jobs_csv_commits_in_chunks(client):
+    client.post("/jobs/", json=create_job_payload(job_board_id="import-dup"))
+    csv_body = (
+        "Title,Company,Location,Status,Job_Board_ID,Notes\n"
+        "Backend Engineer,Stripe,Remote,Applied,import-1,\n"
+        'Frontend Engineer,Stripe,Remote,,import-2,"Line one\nLine two"\n'
+        "Software Engineer,OpenAI,Remote,Applied,import-dup,\n"
+        ",Missing Title,Remote,,,\n"
+        "Data Engineer,Plaid,Remote,Interview,import-3,\n"
+    )
+
+    response = client.post(
+        "/jobs/import?chunk_size=2",
+        content=csv_body.encode("utf-8"),
+        headers={"Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["skipped"], data["invalid"]) == (3, 1, 1)
+    assert [(c["created"], c["skipped"], c["invalid"]) for c in data["chunks"]] == [
+        (2, 0, 0),
+        (0, 1, 1),
+        (1, 0, 0),
+    ]
+    assert data["chunks"][1]["errors"][0]["row"] == 4
+    jobs = client.get("/jobs/search?company=Stripe&sort_by=id&sort_desc=false").json()
+    assert jobs[1]["notes"] == "Line one\nLine two"
+    assert jobs[1]["status"] == "Applied"
+
+
+def test_import_jobs_skips_reused_job_board_ids(client):
+    client.post("/jobs/", json=create_job_payload(job_board_id="board-1"))
+    csv_body = (
+        "Title,Company,Location,Job_Board_ID\n"
+        "Backend Engineer,Stripe,Remote,board-2\n"
+        "Frontend Engineer,Plaid,Remote,board-2\n"
+        "Data Engineer,Ramp,Remote,board-1\n"
+        "QA Engineer,Ramp,Remote,board-3\n"
+    )
+
+    response = client.post("/jobs/import", content=csv_body.encode("utf-8"), headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["skipped"], data["invalid"]) == (2, 2, 0)
+    assert client.get("/jobs/stats").json()["total"] == 3
+
+
+def test_import_jobs_ndjson_reports_invalid_rows(client):
+    body = "\n".join(
+        [
+            '{"title": "Backend Engineer", "company": "Stripe", "location": "Remote"}',
+            "not json",
+            '{"title": "QA", "company": "Stripe", "location": "Remote", "salary": 1}',
+        ]
+    )
+
+    response = client.post(
+        "/jobs/import?format=ndjson",
+        content=body.encode("utf-8"),
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["invalid"]) == (1, 2)
+    assert "Unrecognized columns: salary" in data["chunks"][0]["errors"][1]["error"]
+
+
+def test_import_jobs_caps_errors_kept_per_chunk(client, monkeypatch):
+    monkeypatch.setattr(job_import, "MAX_ERRORS_PER_CHUNK", 2)
+    body = "\n".join(["not json"] * 5)
+
+    response = client.post("/jobs/import?format=ndjson", content=body.encode("utf-8"))
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["invalid"] == 5
+    assert [e["row"] for e in data["chunks"][0]["errors"]] == [1, 2]
+
+
+def test_import_jobs_rejects_missing_columns_and_unknown_format(client):
+    missing = client.post(
+        "/jobs/import",
+        content=b"title,company\nEngineer,Stripe\n",
+        headers={"Content-Type": "text/csv"},
+    )
+    unsupported = client.post("/jobs/import", content=b"{}", headers={"Content-Type": "application/json"})
+
+    assert missing.status_code == 400
+    assert missing.json()["detail"] == "Missing required columns: location"
+    assert unsupported.status_code == 415
+
+
+def test_job_stats_returns_total_and_status_counts(client):
+    client.post("/jobs/", json=create_job_payload(job_board_id="stats-1"))
+    client.post("/jobs/", json=create_job_payload(job_board_id="stats-2", status="Offer"))
+
+    response = client.get("/jobs/stats")
+    rebuilt = client.post("/jobs/stats/rebuild")
+
+    assert response.status_code == 200
+    assert response.json() == {"total": 2, "by_status": {"Applied": 1, "Offer": 1}}
+    assert rebuilt.json() == response.json()
+
+
+def test_read_jobs_cursor_mode_returns_next_cursor(client):
+    for i in range(3):
+        client.post("/jobs/", json=create_job_payload(job_board_id=f"cursor-{i}", title=f"Job {i}"))
+
+    first = client.get("/jobs/?cursor=&limit=2").json()
+    second = client.get("/jobs/", params={"cursor": first["next_cursor"], "limit": 2}).json()
+
+    assert [job["title"] for job in first["items"]] == ["Job 0", "Job 1"]
+    assert [job["title"] for job in second["items"]] == ["Job 2"]
+    assert second["next_cursor"] is None
+
+
+def test_search_jobs_cursor_mode_rejects_garbage_cursor(client):
+    response = client.get("/jobs/search?cursor=not-a-cursor")
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid cursor")
+
+
+def test_search_jobs_full_text_query_combines_with_filters(client):
+    client.post(
+        "/jobs/",
+        json=create_job_payload(job_board_id="fts-1", company="Google", notes="Kubernetes platform team"),
+    )
+    client.post(
+        "/jobs/",
+        json=create_job_payload(job_board_id="fts-2", company="Amazon", notes="Kubernetes operators"),
+    )
+
+    response = client.get("/jobs/search?q=kube%20platform")
+    filtered = client.get("/jobs/search?q=kubernetes&company=Amazon")
+    punctuation_only = client.get("/jobs/search?q=%22%2A")
+
+    assert [job["company"] for job in response.json()] == ["Google"]
+    assert [job["company"] for job in filtered.json()] == ["Amazon"]
+    assert len(punctuation_only.json()) == 2
+
+
+def test_list_and_search_return_304_until_data_changes(client):
+    client.post("/jobs/", json=create_job_payload(job_board_id="etag-1"))
+
+    first = client.get("/jobs/")
+    etag = first.headers["ETag"]
+    cached = client.get("/jobs/", headers={"If-None-Match": etag})
+    search = client.get("/jobs/search?company=OpenAI", headers={"If-None-Match": etag})
+    client.post("/jobs/", json=create_job_payload(job_board_id="etag-2"))
+    after_write = client.get("/jobs/", headers={"If-None-Match": etag})
+
+    assert etag.startswith('W/"')
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert search.status_code == 200
+    assert after_write.status_code == 200
+    assert len(after_write.json()) == 2
+
+
+def test_read_job_etag_changes_when_row_is_updated(client):
+    job_id = client.post("/jobs/", json=create_job_payload(job_board_id="etag-detail")).json()["id"]
+    client.post("/jobs/", json=create_job_payload(job_board_id="etag-other"))
+
+    etag = client.get(f"/jobs/{job_id}").headers["ETag"]
+    client.put(f"/jobs/{job_id + 1}", json={"status": "Offer"})
+    unrelated_write = client.get(f"/jobs/{job_id}", headers={"If-None-Match": etag})
+    client.put(f"/jobs/{job_id}", json={"status": "Rejected"})
+    own_write = client.get(f"/jobs/{job_id}", headers={"If-None-Match": etag})
+
+    assert unrelated_write.status_code == 304
+    assert own_write.status_code == 200
+    assert own_write.json()["status"] == "Rejected"
+
+
+def test_list_and_search_return_sparse_fieldsets(client):
+    client.post("/jobs/", json=create_job_payload(job_board_id="fields-1"))
+
+    sparse = client.get("/jobs/?fields=title,company")
+    summary = client.get("/jobs/search?company=OpenAI&fields=summary")
+    page = client.get("/jobs/search?cursor=&fields=title")
+    invalid = client.get("/jobs/?fields=title,salary")
+
+    assert sparse.json() == [{"id": 1, "title": "Software Engineer", "company": "OpenAI"}]
+    assert sparse.headers["ETag"]
+    assert "job_description" not in summary.json()[0]
+    assert "notes" not in summary.json()[0]
+    assert summary.json()[0]["job_board_id"] == "fields-1"
+    assert page.json() == {"items": [{"id": 1, "title": "Software Engineer"}], "next_cursor": None}
+    assert invalid.status_code == 400
+    assert invalid.json()["detail"] == "Invalid field: salary"
+
+
+def test_list_fast_path_matches_schema_serialization_byte_for_byte(client, db_session):
+    client.post(
+        "/jobs/",
+        json=create_job_payload(
+            job_board_id="bytes-1",
+            title="Ingénieur logiciel   </script>",
+            follow_up_date="2025-10-01",
+            notes=None,
+        ),
+    )
+    client.post("/jobs/", json=create_job_payload(job_board_id="bytes-2", applied_date=None, status=None))
+
+    #What response_model=list[schemas.Job] + JSONResponse produce for ORM rows
+    adapter = TypeAdapter(list[schemas.Job])
+
+    def serialize(jobs):
+        return JSONResponse(adapter.dump_python(adapter.validate_python(jobs), mode="json")).body
+
+    expected = serialize(crud.get_jobs(db_session))
+    search_expected = serialize(crud.get_jobs_by_filters(db_session, sort_by="id", sort_desc=False))
+
+    assert client.get("/jobs/").content == expected
+    assert client.get("/jobs/search?sort_by=id&sort_desc=false").content == search_expected
+
+
+def test_bulk_update_and_delete_by_ids_and_filters(client):
+    ids = [
+        client.post("/jobs/", json=create_job_payload(job_board_id=f"bulk-{i}", company=company)).json()["id"]
+        for i, company in enumerate(["Acme", "Acme", "Globex"])
+    ]
+    before = client.get(f"/jobs/{ids[0]}").json()
+
+    by_ids = client.patch(
+        "/jobs/bulk", json={"ids": [ids[0], ids[2], 999], "changes": {"status": "Rejected"}}
+    )
+    by_filter = client.request("DELETE", "/jobs/bulk", json={"company": "acme", "status": "Applied"})
+    empty = client.request("DELETE", "/jobs/bulk", json={})
+    no_changes = client.patch("/jobs/bulk", json={"ids": ids, "changes": {}})
+    remaining = client.get("/jobs/search?sort_by=id&sort_desc=false").json()
+
+    assert by_ids.status_code == 200
+    assert by_ids.json() == {"affected": 2}
+    assert by_filter.json() == {"affected": 1}
+    assert [(job["id"], job["status"]) for job in remaining] == [(ids[0], "Rejected"), (ids[2], "Rejected")]
+    assert remaining[0]["updated_at"] > before["updated_at"]
+    assert client.get("/jobs/stats").json() == {"total": 2, "by_status": {"Rejected": 2}}
+    assert empty.status_code == 400
+    assert no_changes.status_code == 400
+
+
+def test_bulk_update_rejects_clearing_required_fields(client):
+    job = client.post("/jobs/", json=create_job_payload(job_board_id="bulk-null")).json()
+
+    bulk = client.patch("/jobs/bulk", json={"ids": [job["id"]], "changes": {"title": None}})
+    single = client.put(f"/jobs/{job['id']}", json={"company": None})
+
+    assert bulk.status_code == 422
+    assert single.status_code == 422
+    assert client.get(f"/jobs/{job['id']}").json()["title"] == job["title"]
+
+
+def test_batch_and_import_upsert_report_per_row_results(client):
+    existing = client.post("/jobs/", json=create_job_payload(job_board_id="up-1", status="Interview")).json()
+    client.post("/jobs/", json=create_job_payload(job_board_id="up-2", notes="Keep me"))
+
+    batch = client.post(
+        "/jobs/batch?mode=upsert&merge=overwrite,notes:keep",
+        json=[
+            {"title": "Staff Engineer", "company": "OpenAI", "location": "Remote", "job_board_id": "up-1"},
+            create_job_payload(job_board_id="up-2", notes="Ignored"),
+            {"title": "New role", "company": "Stripe", "location": "Remote", "job_board_id": "up-3"},
+        ],
+    )
+    ndjson_body = (
+        '{"title": "Staff Engineer", "company": "OpenAI", "location": "Remote", "job_board_id": "up-1", "status": "Offer"}\n'
+        '{"title": "New role", "company": "Stripe", "location": "Remote", "job_board_id": "up-3"}\n'
+    )
+    imported = client.post(
+        "/jobs/import?mode=upsert",
+        content=ndjson_body.encode("utf-8"),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    invalid = client.post("/jobs/batch?mode=upsert&merge=notes:replace", json=[])
+
+    assert batch.status_code == 200
+    assert [(row["job_board_id"], row["result"]) for row in batch.json()] == [
+        ("up-1", "updated"),
+        ("up-2", "unchanged"),
+        ("up-3", "inserted"),
+    ]
+    assert batch.json()[0]["id"] == existing["id"]
+    updated = client.get(f"/jobs/{existing['id']}").json()
+    assert (updated["title"], updated["status"]) == ("Staff Engineer", "Offer")
+    data = imported.json()
+    assert (data["created"], data["updated"], data["unchanged"], data["skipped"]) == (0, 1, 1, 0)
+    assert client.get("/jobs/stats").json() == {"total": 3, "by_status": {"Applied": 2, "Offer": 1}}
+    assert invalid.status_code == 400
+    assert invalid.json()["detail"] == "Invalid merge policy: replace"
+
+
+def test_export_streams_filtered_rows_in_each_format(client):
+    client.post("/jobs/", json=create_job_payload(job_board_id="export-1", notes='Said "hi",\nthen left'))
+    client.post("/jobs/", json=create_job_payload(job_board_id="export-2", company="Stripe", applied_date=None))
+
+    csv_resp = client.get("/jobs/export?format=csv")
+    ndjson_resp = client.get("/jobs/export?format=ndjson&company=stripe")
+    listed = client.get("/jobs/").json()
+
+    assert csv_resp.status_code == 200
+    assert csv_resp.headers["content-type"].startswith("text/csv")
+    assert csv_resp.headers["content-disposition"] == 'attachment; filename="jobs.csv"'
+    rows = list(csv.DictReader(io.StringIO(csv_resp.text)))
+    assert [row["job_board_id"] for row in rows] == ["export-1", "export-2"]
+    assert rows[0]["notes"] == 'Said "hi",\nthen left'
+    assert rows[0]["created_at"] == listed[0]["created_at"]
+    assert rows[1]["applied_date"] == ""
+    assert [json.loads(line) for line in ndjson_resp.text.splitlines()] == [listed[1]]
+
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    parquet_resp = client.get("/jobs/export?format=parquet&q=openai")
+    table = pyarrow_parquet.read_table(io.BytesIO(parquet_resp.content))
+    assert table.column("job_board_id").to_pylist() == ["export-1"]
+    assert table.column("applied_date").to_pylist() == [date(2025, 9, 26)]
+
+
+def test_job_changes_returns_only_the_delta_with_tombstones(client):
+    first = client.post("/jobs/", json=create_job_payload(job_board_id="feed-1")).json()
+    second = client.post("/jobs/", json=create_job_payload(job_board_id="feed-2")).json()
+
+    snapshot = client.get("/jobs/changes").json()
+    client.delete(f"/jobs/{first['id']}")
+    client.put(f"/jobs/{second['id']}", json={"status": "Interview"})
+    third = client.post("/jobs/", json=create_job_payload(job_board_id="feed-3")).json()
+    delta = client.get(f"/jobs/changes?since={snapshot['seq']}").json()
+    empty = client.get(f"/jobs/changes?since={delta['seq']}").json()
+    ahead = client.get(f"/jobs/changes?since={delta['seq'] + 1}")
+
+    assert [job["id"] for job in snapshot["changed"]] == [first["id"], second["id"]]
+    assert snapshot["deleted"] == []
+    assert [(job["id"], job["status"]) for job in delta["changed"]] == [
+        (second["id"], "Interview"),
+        (third["id"], "Applied"),
+    ]
+    assert delta["changed"][1] == client.get(f"/jobs/{third['id']}").json()
+    assert delta["deleted"] == [first["id"]]
+    assert delta["seq"] > snapshot["seq"]
+    assert empty == {"seq": delta["seq"], "changed": [], "deleted": []}
+    assert ahead.status_code == 410
+
+
+def test_job_events_stream_committed_writes_and_coalesce_slow_subscribers(client):
+    async def scenario():
+        stream = jobs_router._event_stream(job_events.broker.subscribe())
+        slow = job_events.broker.subscribe(maxsize=2)
+        assert await stream.__anext__() == b"retry: 5000\n\n"
+
+        job = client.post("/jobs/", json=create_job_payload(job_board_id="sse-1")).json()
+        client.post("/jobs/", json=create_job_payload(job_board_id="sse-2"))
+        client.patch("/jobs/bulk", json={"ids": [1, 2], "changes": {"job_board_id": "same"}})
+        client.put(f"/jobs/{job['id']}", json={"status": "Interview"})
+        client.delete(f"/jobs/{job['id']}")
+
+        frames = [await asyncio.wait_for(stream.__anext__(), 1) for _ in range(4)]
+        coalesced = await asyncio.wait_for(slow.get(), 1)
+        await stream.aclose()
+        slow.close()
+        return frames, coalesced, slow.dropped
+
+    frames, coalesced, dropped = asyncio.run(scenario())
+    events = [json.loads(frame.split(b"data: ")[1]) for frame in frames]
+
+    assert frames[0].startswith(b"id: %d\nevent: created\n" % events[0]["seq"])
+    assert [(e["op"], e["ids"], e["fields"]) for e in events] == [
+        ("created", [1], None),
+        ("created", [2], None),
+        ("updated", [1], ["status"]),
+        ("deleted", [1], None),
+    ]
+    assert events[3]["seq"] > events[2]["seq"]
+    #Third event overflowed the slow queue: its backlog became one resync marker
+    assert coalesced == {"op": "resync", "seq": events[2]["seq"]}
+    assert dropped == 2
+    assert job_events.broker.subscriber_count == 0
+
+
+def test_follow_ups_endpoint_and_scheduler_track_writes(client):
+    today = date.today()
+    dates = [today - timedelta(days=3), today, today + timedelta(days=2), today + timedelta(days=30)]
+    ids = [
+        client.post(
+            "/jobs/", json=create_job_payload(job_board_id=f"fu-{i}", follow_up_date=d.isoformat())
+        ).json()["id"]
+        for i, d in enumerate(dates)
+    ]
+    client.post("/jobs/", json=create_job_payload(job_board_id="fu-closed", status="Rejected", follow_up_date=today.isoformat()))
+    #Anything already due fires (and leaves the heap) on the app's loop
+    for _ in range(100):
+        upcoming = follow_ups.scheduler.next_due()
+        if upcoming > datetime.now():
+            break
+        time.sleep(0.01)
+
+    due = client.get("/jobs/follow-ups").json()
+    week = client.get(f"/jobs/follow-ups?since={today.isoformat()}&until={(today + timedelta(days=7)).isoformat()}").json()
+    with_closed = client.get("/jobs/follow-ups?include_closed=true").json()
+    client.put(f"/jobs/{ids[2]}", json={"status": "Rejected"})
+
+    assert [(job["id"], job["overdue"]) for job in due] == [(ids[0], True), (ids[1], False)]
+    assert [job["id"] for job in week] == [ids[1], ids[2]]
+    assert len(with_closed) == 3
+    assert upcoming in (follow_ups.scheduler.due_at(today), follow_ups.scheduler.due_at(dates[2]))
+    assert follow_ups.scheduler.pop_due(follow_ups.scheduler.due_at(dates[3])) in ([ids[1], ids[3]], [ids[3]])
+
+
+def test_follow_up_scheduler_keeps_a_lazy_min_heap_and_fires_when_due():
+    fired = []
+    scheduler = follow_ups.FollowUpScheduler(fired.append)
+    now = datetime(2025, 10, 1, 12, 0)
+    scheduler.load(
+        [(1, date(2025, 10, 3), "Applied"), (2, date(2025, 10, 2), None), (3, date(2025, 9, 30), "Applied")],
+        now=now,
+    )
+
+    scheduler.update([(2, date(2025, 10, 5), "Interview"), (1, date(2025, 10, 4), "Rejected"), (4, date(2025, 10, 2), "Applied"),
+                      (6, date(2025, 10, 2), "Withdrawn")])
+
+    assert scheduler.next_due() == datetime(2025, 10, 2, 9, 0)
+    assert scheduler.pop_due(datetime(2025, 10, 4, 9, 0)) == [4]
+    assert scheduler.pop_due(datetime(2025, 12, 1)) == [2]
+    assert scheduler.next_due() is None
+
+    async def scenario():
+        scheduler.start([])
+        scheduler.update([(5, date.today() - timedelta(days=1), "Applied")])
+        for _ in range(100):
+            if fired:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+    assert fired == [[5]]
+
+
+def test_batch_similarity_skips_fuzzy_duplicates_and_duplicates_scan(client):
+    stored = client.post(
+        "/jobs/", json=create_job_payload(title="Senior Backend Engineer", company="Initech, Inc.", job_board_id=None)
+    ).json()
+
+    response = client.post(
+        "/jobs/batch?similarity=0.8",
+        json=[
+            create_job_payload(title="Sr Backend Engineer", company="INITECH", job_board_id=None),
+            create_job_payload(title="Data Scientist", company="Initech", job_board_id=None, job_link=None),
+            create_job_payload(title="Data Scientist", company="Initech LLC", job_board_id=None, job_link=None),
+        ],
+    )
+
+    assert response.status_code == 200
+    ids = [job["id"] for job in response.json()]
+    assert ids[0] == stored["id"]
+    assert ids[2] == ids[1] != stored["id"]
+    assert client.get("/jobs/stats").json()["total"] == 2
+    assert client.post("/jobs/batch?mode=upsert&similarity=0.8", json=[]).status_code == 400
+
+    #Without the check the near-duplicate is stored, and the scan reports it
+    created = client.post(
+        "/jobs/batch", json=[create_job_payload(title="Backend Engineer, Senior", company="initech", job_board_id=None)]
+    ).json()[0]
+    response = client.get("/jobs/duplicates")
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": created["id"], "duplicate_of": stored["id"], "score": 1.0, "reason": "link"}
+    ]
+    assert client.get("/jobs/duplicates?threshold=0").status_code == 422
+
+
+def test_dedup_prefix_filter_finds_every_pair_above_threshold():
+    rng = random.Random(7)
+    words = ["senior", "staff", "software", "backend", "frontend", "engineer", "data", "platform", "lead"]
+    rows = [
+        SimpleNamespace(id=i, title_key=" ".join(sorted(set(rng.sample(words, rng.randint(1, 4))))), location_key=None)
+        for i in range(200)
+    ]
+
+    for threshold in (0.5, 0.8, 1.0):
+        found = {(a.id, b.id) for a, b, _ in dedup.similar_pairs(rows, threshold)}
+        expected = {
+            (a.id, b.id)
+            for i, a in enumerate(rows)
+            for b in rows[i + 1:]
+            if dedup.jaccard(set(a.title_key.split()), set(b.title_key.split())) >= threshold
+        }
+        assert found == expected
+
+    assert dedup.normalize_title("Sr. Front-End Dev") == "developer frontend senior"
+    assert dedup.normalize_company("The Acme Co.") == "acme"
+    assert dedup.normalize_link("https://WWW.Boards.io/x/12/?gh_jid=5&utm_source=li") == "boards.io/x/12?gh_jid=5"
+
+
+def test_status_funnel_endpoint_reflects_status_changes(client):
+    first = client.post("/jobs/", json=create_job_payload(job_board_id="f-1")).json()
+    client.post("/jobs/", json=create_job_payload(job_board_id="f-2"))
+    client.put(f"/jobs/{first['id']}", json={"status": "Interview"})
+
+    response = client.get("/jobs/stats/funnel")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "stages": [
+            {
+                "status": "Applied",
+                "entered": 2,
+                "exited": 1,
+                "median_dwell_hours": 0,
+                "next": [{"status": "Interview", "count": 1, "conversion": 0.5}],
+            },
+            {"status": "Interview", "entered": 1, "exited": 0, "median_dwell_hours": None, "next": []},
+        ]
+    }
+    assert client.post("/jobs/stats/funnel/rebuild").json() == response.json()
+
+
+def test_timeseries_endpoint_defaults_to_recent_buckets(client):
+    today = date.today()
+    client.post("/jobs/", json=create_job_payload(applied_date=today.isoformat(), job_board_id="t-1"))
+    client.post("/jobs/", json=create_job_payload(applied_date="2001-01-01", job_board_id="t-2"))
+
+    response = client.get("/jobs/stats/timeseries?granularity=month")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["end"] == today.isoformat()
+    assert data["start"] == crud.shift_buckets(today.replace(day=1), "month", -11).isoformat()
+    assert data["points"] == [
+        {
+            "bucket": today.replace(day=1).isoformat(),
+            "source": None,
+            "applications": 1,
+            "responses": 0,
+            "by_status": {"Applied": 1},
+        }
+    ]
+    assert client.get("/jobs/stats/timeseries?granularity=day&start=2001-01-01").status_code == 400
+    assert client.get("/jobs/stats/timeseries?granularity=year").status_code == 422
+    assert client.post("/jobs/stats/timeseries/rebuild").status_code == 204
+
+
+def test_archive_endpoint_and_search_include_archived(client, monkeypatch):
+    monkeypatch.setattr(archival, "settings", archival.ArchiveSettings(batch_size=1, pause=0))
+    client.post("/jobs/batch", json=[
+        create_job_payload(title="Platform Engineer", status="Rejected", job_board_id="a-1", applied_date="2025-01-01"),
+        create_job_payload(title="Platform Lead", status="Rejected", job_board_id="a-2", applied_date="2025-02-01"),
+        create_job_payload(title="Platform Manager", status="Applied", job_board_id="a-3", applied_date="2025-03-01"),
+    ])
+
+    assert client.post("/jobs/archive").json() == {"affected": 0}
+    assert client.post("/jobs/archive?older_than_days=0").json() == {"affected": 2}
+
+    hot = client.get("/jobs/search", params={"q": "platform"}).json()
+    both = client.get("/jobs/search", params={"q": "platform", "include_archived": True, "fields": "title"}).json()
+
+    assert [job["title"] for job in hot] == ["Platform Manager"]
+    assert [job["title"] for job in both] == ["Platform Manager", "Platform Lead", "Platform Engineer"]
+    assert client.get("/jobs/stats").json()["total"] == 3
+    assert client.get("/jobs/search?include_archived=true&cursor=").status_code == 400
@@ -0,0 +1,123 @@
+from datetime import date, datetime
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from ..models import models
+from ..schemas import schemas
+from . import crud
+
+# Async counterparts of the crud functions. Each one runs the sync
+# implementation through AsyncSession.run_sync, so the query logic lives
+# in one place and the driver I/O stays non-blocking.
+
+async def create_job(db: AsyncSession, job: schemas.JobCreate) -> models.Job:
+    return await db.run_sync(crud.create_job, job)
+
+async def create_jobs_batch(db: AsyncSession, jobs: list[schemas.JobCreate]) -> list[models.Job]:
+    return await db.run_sync(crud.create_jobs_batch, jobs)
+
+async def import_jobs_chunk(db: AsyncSession, jobs: list[schemas.JobCreate]) -> tuple[int, int]:
+    return await db.run_sync(crud.import_jobs_chunk, jobs)
+
+async def upsert_jobs(
+    db: AsyncSession, jobs: list[schemas.JobCreate], policy: Optional[dict[str, str]] = None
+) -> list[schemas.UpsertResult]:
+    return await db.run_sync(crud.upsert_jobs, jobs, policy)
+
+async def get_job_by_id(db: AsyncSession, job_id: int) -> Optional[models.Job]:
+    return await db.run_sync(crud.get_job_by_id, job_id)
+
+async def get_jobs(
+    db: AsyncSession, skip: int = 0, limit: int = 100, fields: Optional[list[str]] = None
+) -> list[Any]:
+    return await db.run_sync(crud.get_jobs, skip, limit, fields)
+
+async def update_job(
+    db: AsyncSession, job_id: int, job_update: schemas.JobUpdate
+) -> Optional[models.Job]:
+    return await db.run_sync(crud.update_job, job_id, job_update)
+
+async def delete_job(db: AsyncSession, job_id: int) -> Optional[models.Job]:
+    return await db.run_sync(crud.delete_job, job_id)
+
+async def bulk_update_jobs(
+    db: AsyncSession, selection: schemas.JobSelection, job_update: schemas.JobUpdate
+) -> int:
+    return await db.run_sync(crud.bulk_update_jobs, selection, job_update)
+
+async def bulk_delete_jobs(db: AsyncSession, selection: schemas.JobSelection) -> int:
+    return await db.run_sync(crud.bulk_delete_jobs, selection)
+
+async def get_jobs_by_filters(db: AsyncSession, **filters: Any) -> list[Any]:
+    return await db.run_sync(lambda session: crud.get_jobs_by_filters(session, **filters))
+
+async def get_jobs_page(db: AsyncSession, **params: Any) -> tuple[list[Any], Optional[str]]:
+    return await db.run_sync(lambda session: crud.get_jobs_page(session, **params))
+
+async def stream_jobs(
+    bind: AsyncEngine, fields: list[str], batch_size: int, **filters: Any
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Streams matching rows in batches of batch_size off a server-side cursor.
+    Runs while the response is being sent, after the request's session is
+    closed, so it opens its own session on the given engine.
+    """
+    async with AsyncSession(bind) as db:
+        statement = await db.run_sync(
+            lambda session: crud.get_export_statement(session, fields, **filters)
+        )
+        result = await db.stream(statement.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+async def get_job_changes(
+    db: AsyncSession, since: int, fields: Optional[list[str]] = None
+) -> tuple[int, list[Any], list[int]]:
+    return await db.run_sync(crud.get_job_changes, since, fields)
+
+async def get_follow_ups(
+    db: AsyncSession,
+    until: date,
+    since: Optional[date] = None,
+    include_closed: bool = False,
+    fields: Optional[list[str]] = None,
+) -> list[Any]:
+    return await db.run_sync(crud.get_follow_ups, until, since, include_closed, fields)
+
+async def get_follow_up_schedule(db: AsyncSession, start: date) -> list[tuple]:
+    return await db.run_sync(crud.get_follow_up_schedule, start)
+
+async def archive_jobs(db: AsyncSession, before: datetime, limit: int) -> int:
+    return await db.run_sync(crud.archive_jobs, before, limit)
+
+async def get_data_version(db: AsyncSession) -> int:
+    return await db.run_sync(crud.get_data_version)
+
+async def get_job_updated_at(db: AsyncSession, job_id: int) -> Optional[datetime]:
+    return await db.run_sync(crud.get_job_updated_at, job_id)
+
+async def get_job_stats(db: AsyncSession) -> schemas.JobStats:
+    return await db.run_sync(crud.get_job_stats)
+
+async def rebuild_status_counts(db: AsyncSession) -> None:
+    await db.run_sync(crud.rebuild_status_counts)
+
+async def get_status_funnel(db: AsyncSession) -> schemas.StatusFunnel:
+    return await db.run_sync(crud.get_status_funnel)
+
+async def rebuild_status_funnel(db: AsyncSession) -> None:
+    await db.run_sync(crud.rebuild_status_funnel)
+
+async def get_job_timeseries(
+    db: AsyncSession,
+    granularity: str,
+    start: date,
+    end: date,
+    by_source: bool = False,
+    source: Optional[str] = None,
+) -> schemas.JobTimeseries:
+    return await db.run_sync(crud.get_job_timeseries, granularity, start, end, by_source, source)
+
+async def rebuild_activity_counts(db: AsyncSession) -> None:
+    await db.run_sync(crud.rebuild_activity_counts)
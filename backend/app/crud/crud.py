@@ -1,13 +1,42 @@
-from sqlalchemy.orm import Session
-from typing import Optional
+import base64
+import binascii
+import json
+import re
+from collections import Counter
+from itertools import groupby
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import Row, Select, and_, bindparam, column, delete, event, func, insert, literal, literal_column, or_, select, table, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Query, Session, undefer
+from types import SimpleNamespace
+from typing import Any, Iterable, Iterator, Optional, TypeVar, Union
 
+from ..db.search_index import FTS_COLUMNS, FTS_TABLE, build_match_query
 from ..models import models
 from ..schemas import schemas
+from ..services import dedup, follow_ups, job_events
+
+jobs_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+#job_description is deferred on the model; paths that return full jobs load it explicitly
+JOB_ATTRIBUTES = [attr.key for attr in models.Job.__mapper__.column_attrs]
+
+def _jobs_query(db: Session) -> Query:
+    return db.query(models.Job).options(undefer(models.Job.job_description))
+
+def _refresh_job(db: Session, db_job: models.Job) -> None:
+    db.refresh(db_job, JOB_ATTRIBUTES)
+
+def _select_fields(query: Query, fields: list[str], *required: str) -> Query:
+    #Only the requested columns (in that order, plus id and any keys the
+    #caller needs) are selected; rows come back as named tuples
+    names = dict.fromkeys([*fields, "id", *required])
+    return query.with_entities(*(getattr(models.Job, name) for name in names))
 
 def create_job(db: Session, job: schemas.JobCreate) -> models.Job:
     #Check for duplicate job posting
     if job.job_board_id and job.company:
-        existing_job = db.query(models.Job).filter(
+        existing_job = _jobs_query(db).filter(
             models.Job.job_board_id == job.job_board_id,
             models.Job.company == job.company
         ).first()
@@ -26,56 +55,887 @@ def create_job(db: Session, job: schemas.JobCreate) -> models.Job:
         resume_path=job.resume_path,
         job_board_id=job.job_board_id,
         source=job.source,
-        notes=job.notes
+        notes=job.notes,
+        **dedup.job_keys(job)
     )
     
     #Add to session and commit
     db.add(db_job)
+    db.flush()
+    _adjust_status_counts(db, {job.status: 1})
+    _adjust_activity(db, {_activity_key(job): 1})
+    _record_status_events(db, [(db_job.id, job.status)], datetime.now(timezone.utc), created=True)
+    _log_changes(db, [db_job.id], "created")
+    if job.follow_up_date:
+        _queue_follow_ups(db, [(db_job.id, job.follow_up_date, job.status)])
     db.commit()
-    db.refresh(db_job)
+    _refresh_job(db, db_job)
     return db_job
 
+def _dialect_insert(db: Session):
+    #Dialect-specific insert() that supports ON CONFLICT upserts
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+def _adjust_status_counts(db: Session, deltas: dict[Optional[str], int]) -> None:
+    #Apply count deltas per status in the caller's transaction
+    params = [
+        {"status": status or "", "count": delta}
+        for status, delta in deltas.items() if delta
+    ]
+    if not params:
+        return
+    table = models.JobStatusCount.__table__
+    stmt = _dialect_insert(db)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.status],
+        set_={"count": table.c.count + stmt.excluded.count},
+    )
+    db.execute(stmt, params)
+
+def _bump_data_version(db: Session) -> int:
+    table = models.DataVersion.__table__
+    stmt = _dialect_insert(db)(table).values(id=1, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={"version": table.c.version + 1},
+    )
+    return db.execute(stmt.returning(table.c.version)).scalar_one()
+
+def _log_changes(
+    db: Session, job_ids: list[int], op: str, fields: Optional[list[str]] = None
+) -> None:
+    #Every write to jobs bumps the version in the same transaction and stamps
+    #the touched jobs with it (deletes leave a tombstone) for the change feed.
+    #The push event is queued on the session and published once it commits.
+    version = _bump_data_version(db)
+    if not job_ids:
+        return
+    db.info.setdefault("job_events", []).append(job_events.job_event(version, op, job_ids, fields))
+    deleted = op in ("deleted", "archived")
+    table = models.JobChange.__table__
+    stmt = _dialect_insert(db)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.job_id],
+        set_={"seq": stmt.excluded.seq, "deleted": stmt.excluded.deleted},
+    )
+    db.execute(stmt, [{"job_id": job_id, "seq": version, "deleted": deleted} for job_id in job_ids])
+
+def _queue_follow_ups(db: Session, entries: Iterable[follow_ups.FollowUpEntry]) -> None:
+    #(job_id, follow_up_date, status) of written jobs, handed to the reminder
+    #scheduler after commit
+    db.info.setdefault("follow_ups", []).extend(entries)
+
+def _as_utc(value: datetime) -> datetime:
+    #SQLite hands back timezone-aware columns as naive UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _increment_rollup(db: Session, model: Any, keys: tuple[str, ...], counts: Counter) -> None:
+    #count += delta per primary key, in the caller's transaction
+    if not counts:
+        return
+    table = model.__table__
+    stmt = _dialect_insert(db)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={"count": table.c.count + stmt.excluded.count},
+    )
+    db.execute(stmt, [{**dict(zip(keys, key)), "count": count} for key, count in counts.items()])
+
+def _last_status_events(db: Session, job_ids: list[int]) -> dict[int, Row]:
+    events = models.JobStatusEvent
+    latest: dict[int, Row] = {}
+    for chunk in _chunked(sorted(set(job_ids)), IN_CHUNK_SIZE):
+        last_ids = select(func.max(events.id)).where(events.job_id.in_(chunk)).group_by(events.job_id)
+        for row in db.execute(
+            select(events.job_id, events.status, events.occurred_at).where(events.id.in_(last_ids))
+        ):
+            latest[row.job_id] = row
+    return latest
+
+def _dwell_hours(entered_at: datetime, left_at: datetime) -> int:
+    return max(int((_as_utc(left_at) - _as_utc(entered_at)).total_seconds() // 3600), 0)
+
+def _record_status_events(
+    db: Session, entries: Iterable[tuple[int, Optional[str]]], at: datetime, created: bool = False
+) -> None:
+    #Appends a history event for each job whose status differs from its last
+    #recorded one and folds it into the funnel rollups: one transition, plus
+    #the time spent in the status it left. New jobs need no lookup.
+    entries = list(entries)
+    previous = {} if created else _last_status_events(db, [job_id for job_id, _ in entries])
+    events: list[dict[str, Any]] = []
+    transitions: Counter = Counter()
+    dwell: Counter = Counter()
+    for job_id, status in entries:
+        status = status or ""
+        last = previous.get(job_id)
+        if last is not None and last.status == status:
+            continue
+        events.append({
+            "job_id": job_id,
+            "from_status": None if last is None else last.status,
+            "status": status,
+            "occurred_at": at,
+        })
+        transitions[("" if last is None else last.status, status)] += 1
+        if last is not None and last.status:
+            dwell[(last.status, _dwell_hours(last.occurred_at, at))] += 1
+    if events:
+        db.execute(insert(models.JobStatusEvent), events)
+    _increment_rollup(db, models.JobStatusTransition, ("from_status", "to_status"), transitions)
+    _increment_rollup(db, models.JobStatusDwell, ("status", "hours"), dwell)
+
+#Activity rollups: jobs per applied_date bucket, source and status
+TIMESERIES_GRANULARITIES = ("day", "week", "month")
+ACTIVITY_COLUMNS = frozenset({"applied_date", "source", "status"})
+#Statuses that mean no answer yet; anything else counts as a response
+NO_RESPONSE_STATUSES = ("", "Saved", "Applied")
+
+ActivityKey = tuple[Optional[date], Optional[str], Optional[str]]
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def _activity_key(job: Any) -> ActivityKey:
+    return (job.applied_date, job.source, job.status)
+
+def _adjust_activity(db: Session, deltas: dict[ActivityKey, int]) -> None:
+    #Apply job count deltas per (applied_date, source, status) to every
+    #granularity's bucket. Jobs without an applied_date are not counted.
+    counts: Counter = Counter()
+    for (applied_date, source, status), delta in deltas.items():
+        if applied_date is None or not delta:
+            continue
+        for granularity in TIMESERIES_GRANULARITIES:
+            counts[(granularity, bucket_start(applied_date, granularity), source or "", status or "")] += delta
+    _increment_rollup(
+        db,
+        models.JobActivityCount,
+        ("granularity", "bucket", "source", "status"),
+        Counter({key: count for key, count in counts.items() if count}),
+    )
+
+def _activity_where(db: Session, clause: Any) -> Counter:
+    rows = db.execute(
+        select(models.Job.applied_date, models.Job.source, models.Job.status, func.count())
+        .where(clause)
+        .group_by(models.Job.applied_date, models.Job.source, models.Job.status)
+    )
+    return Counter({(applied_date, source, status): count for applied_date, source, status, count in rows})
+
+@event.listens_for(Session, "after_commit")
+def _publish_job_events(db: Session) -> None:
+    for job_event in db.info.pop("job_events", []):
+        job_events.broker.publish(job_event)
+    entries = db.info.pop("follow_ups", None)
+    if entries:
+        follow_ups.scheduler.update(entries)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_job_events(db: Session) -> None:
+    db.info.pop("job_events", None)
+    db.info.pop("follow_ups", None)
+
+def get_data_version(db: Session) -> int:
+    return db.scalar(select(models.DataVersion.version).where(models.DataVersion.id == 1)) or 0
+
+def get_job_updated_at(db: Session, job_id: int) -> Optional[datetime]:
+    #Cheap primary-key probe used for the detail ETag
+    return db.scalar(select(models.Job.updated_at).where(models.Job.id == job_id))
+
+def _recount_status_counts(db: Session) -> None:
+    #Archived jobs keep counting, archiving does not touch the counters
+    db.execute(delete(models.JobStatusCount))
+    statuses = union_all(
+        select(func.coalesce(models.Job.status, "").label("status")),
+        select(func.coalesce(models.JobArchive.status, "").label("status")),
+    ).subquery()
+    db.execute(
+        insert(models.JobStatusCount).from_select(
+            ["status", "count"],
+            select(statuses.c.status, func.count()).group_by(statuses.c.status),
+        )
+    )
+
+def rebuild_status_counts(db: Session) -> None:
+    """Recomputes the status counters from the jobs table with a GROUP BY."""
+    _recount_status_counts(db)
+    db.commit()
+
+def ensure_status_counts(db: Session) -> None:
+    #Backfill counters for databases created before they existed
+    has_counts = db.scalar(select(models.JobStatusCount.status).limit(1)) is not None
+    if not has_counts and db.scalar(select(models.Job.id).limit(1)) is not None:
+        rebuild_status_counts(db)
+
+def get_job_stats(db: Session) -> schemas.JobStats:
+    counts = db.execute(
+        select(models.JobStatusCount.status, models.JobStatusCount.count)
+    ).all()
+    return schemas.JobStats(
+        total=sum(count for _, count in counts),
+        by_status={status: count for status, count in counts if status and count},
+    )
+
+def ensure_change_log(db: Session) -> None:
+    #Backfill the change feed for databases created before it existed
+    has_changes = db.scalar(select(models.JobChange.job_id).limit(1)) is not None
+    if has_changes or db.scalar(select(models.Job.id).limit(1)) is None:
+        return
+    version = _bump_data_version(db)
+    db.execute(
+        insert(models.JobChange).from_select(
+            ["job_id", "seq", "deleted"],
+            select(models.Job.id, literal(version), literal(False)),
+        )
+    )
+    db.commit()
+
+def _recount_status_funnel(db: Session) -> None:
+    #Replays the whole history; LAG gives the time each status was entered
+    events = models.JobStatusEvent
+    entered_at = func.lag(events.occurred_at, type_=events.occurred_at.type).over(partition_by=events.job_id, order_by=events.id)
+    rows = db.execute(
+        select(events.from_status, events.status, events.occurred_at, entered_at.label("entered_at")),
+        execution_options={"yield_per": 5000},
+    )
+    transitions: Counter = Counter()
+    dwell: Counter = Counter()
+    for from_status, status, occurred_at, entered in rows:
+        transitions[(from_status or "", status)] += 1
+        if from_status and entered is not None:
+            dwell[(from_status, _dwell_hours(entered, occurred_at))] += 1
+    db.execute(delete(models.JobStatusTransition))
+    db.execute(delete(models.JobStatusDwell))
+    _increment_rollup(db, models.JobStatusTransition, ("from_status", "to_status"), transitions)
+    _increment_rollup(db, models.JobStatusDwell, ("status", "hours"), dwell)
+
+def rebuild_status_funnel(db: Session) -> None:
+    """Recomputes the funnel rollups from the status history."""
+    _recount_status_funnel(db)
+    db.commit()
+
+def ensure_status_history(db: Session) -> None:
+    #Seed history for databases created before it existed: each job's
+    #current status, entered when the job was created
+    has_events = db.scalar(select(models.JobStatusEvent.id).limit(1)) is not None
+    if has_events or db.scalar(select(models.Job.id).limit(1)) is None:
+        return
+    db.execute(
+        insert(models.JobStatusEvent).from_select(
+            ["job_id", "from_status", "status", "occurred_at"],
+            select(
+                models.Job.id,
+                literal(None),
+                func.coalesce(models.Job.status, ""),
+                func.coalesce(models.Job.created_at, datetime.now(timezone.utc)),
+            ),
+        )
+    )
+    rebuild_status_funnel(db)
+
+def get_status_funnel(db: Session) -> schemas.StatusFunnel:
+    """
+    Stage-to-stage conversion and median time in each stage, read from the
+    rollups. The median is the first dwell-histogram bucket whose running
+    total (a window sum) reaches half of the stage's exits.
+    """
+    dwell = models.JobStatusDwell
+    cumulative = select(
+        dwell.status,
+        dwell.hours,
+        func.sum(dwell.count).over(partition_by=dwell.status, order_by=dwell.hours).label("running"),
+        func.sum(dwell.count).over(partition_by=dwell.status).label("total"),
+    ).subquery()
+    medians = dict(
+        db.execute(
+            select(cumulative.c.status, func.min(cumulative.c.hours))
+            .where(cumulative.c.running * 2 >= cumulative.c.total)
+            .group_by(cumulative.c.status)
+        ).tuples().all()
+    )
+    entered: Counter = Counter()
+    exits: dict[str, list[tuple[str, int]]] = {}
+    for from_status, to_status, count in db.execute(
+        select(models.JobStatusTransition.from_status, models.JobStatusTransition.to_status, models.JobStatusTransition.count)
+        .order_by(models.JobStatusTransition.count.desc(), models.JobStatusTransition.to_status)
+    ):
+        entered[to_status] += count
+        if from_status:
+            exits.setdefault(from_status, []).append((to_status, count))
+    #"" (no status) is where jobs enter the funnel, not a stage
+    stages = sorted((status for status in {*entered, *exits} if status), key=lambda s: (-entered[s], s))
+    return schemas.StatusFunnel(stages=[
+        schemas.FunnelStage(
+            status=status,
+            entered=entered[status],
+            exited=sum(count for _, count in exits.get(status, [])),
+            median_dwell_hours=medians.get(status),
+            next=[
+                schemas.FunnelTransition(
+                    status=to_status or None,
+                    count=count,
+                    conversion=round(count / entered[status], 4) if entered[status] else None,
+                )
+                for to_status, count in exits.get(status, [])
+            ],
+        )
+        for status in stages
+    ])
+
+def _recount_activity(db: Session) -> None:
+    db.execute(delete(models.JobActivityCount))
+    activity = _activity_where(db, models.Job.applied_date.is_not(None))
+    #Archived jobs are still part of the history
+    archive = models.JobArchive
+    activity.update({
+        (applied_date, source, status): count
+        for applied_date, source, status, count in db.execute(
+            select(archive.applied_date, archive.source, archive.status, func.count())
+            .where(archive.applied_date.is_not(None))
+            .group_by(archive.applied_date, archive.source, archive.status)
+        )
+    })
+    _adjust_activity(db, activity)
+
+def rebuild_activity_counts(db: Session) -> None:
+    """Recomputes the activity rollups from the jobs table with a GROUP BY."""
+    _recount_activity(db)
+    db.commit()
+
+def ensure_activity_counts(db: Session) -> None:
+    #Backfill the rollups for databases created before they existed
+    has_counts = db.scalar(select(models.JobActivityCount.bucket).limit(1)) is not None
+    if not has_counts and db.scalar(select(models.Job.id).where(models.Job.applied_date.is_not(None)).limit(1)):
+        rebuild_activity_counts(db)
+
+def shift_buckets(bucket: date, granularity: str, periods: int) -> date:
+    #Start of the bucket `periods` buckets after (or before, if negative) this one
+    if granularity == "month":
+        month = bucket.year * 12 + bucket.month - 1 + periods
+        return date(month // 12, month % 12 + 1, 1)
+    return bucket + timedelta(days=periods * (7 if granularity == "week" else 1))
+
+def get_job_timeseries(
+    db: Session,
+    granularity: str,
+    start: date,
+    end: date,
+    by_source: bool = False,
+    source: Optional[str] = None,
+) -> schemas.JobTimeseries:
+    """
+    Applications and responses per applied_date bucket between start and
+    end, optionally split by source. Reads only the rollup rows of those
+    buckets, so the cost depends on the window, not the history.
+    Empty buckets are omitted.
+    """
+    counts = models.JobActivityCount
+    group = [counts.bucket, *([counts.source] if by_source else []), counts.status]
+    query = (
+        select(*group, func.sum(counts.count))
+        .where(
+            counts.granularity == granularity,
+            counts.bucket.between(bucket_start(start, granularity), end),
+        )
+        .group_by(*group)
+        .order_by(*group)
+    )
+    if source is not None:
+        query = query.where(counts.source == source)
+    points: dict[tuple[date, Optional[str]], schemas.TimeseriesPoint] = {}
+    for row in db.execute(query):
+        count = row[-1]
+        if not count:
+            continue
+        point_source = (row.source or None) if by_source else None
+        point = points.setdefault(
+            (row.bucket, point_source),
+            schemas.TimeseriesPoint(bucket=row.bucket, source=point_source, applications=0, responses=0),
+        )
+        point.applications += count
+        if row.status not in NO_RESPONSE_STATUSES:
+            point.responses += count
+        if row.status:
+            point.by_status[row.status] = count
+    return schemas.JobTimeseries(
+        granularity=granularity, start=bucket_start(start, granularity), end=end, points=list(points.values())
+    )
+
+def ensure_dedup_keys(db: Session) -> None:
+    #Backfill duplicate-detection keys for rows stored before the key columns
+    #existed. Internal columns only: no change feed entry, updated_at kept.
+    table = models.Job.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("job_id"))
+        .values({**{key: bindparam(key) for key in dedup.KEY_COLUMNS.values()}, "updated_at": table.c.updated_at})
+    )
+    missing = db.scalars(
+        select(models.Job.id).where(models.Job.company_key.is_(None), models.Job.title_key.is_(None))
+    ).all()
+    for chunk in _chunked(missing, IN_CHUNK_SIZE):
+        rows = db.execute(
+            select(models.Job.id, *(getattr(models.Job, name) for name in dedup.KEY_COLUMNS))
+            .where(models.Job.id.in_(chunk))
+        )
+        db.execute(stmt, [{"job_id": row.id, **dedup.job_keys(row)} for row in rows])
+    db.commit()
+
+def get_job_changes(
+    db: Session, since: int, fields: Optional[list[str]] = None
+) -> tuple[int, list[Any], list[int]]:
+    """
+    Change feed: jobs created or updated and ids deleted after `since`.
+    Returns (seq, changed, deleted) where seq is the version to pass as
+    `since` next time. Changes committed after seq was read are left for
+    the next call.
+    """
+    seq = get_data_version(db)
+    window = and_(models.JobChange.seq > since, models.JobChange.seq <= seq)
+    query = _jobs_query(db).join(models.JobChange, models.JobChange.job_id == models.Job.id)
+    if fields:
+        query = _select_fields(query, fields)
+    changed = query.filter(window, models.JobChange.deleted.is_(False)).order_by(models.Job.id).all()
+    deleted = db.scalars(
+        select(models.JobChange.job_id)
+        .where(window, models.JobChange.deleted.is_(True))
+        .order_by(models.JobChange.job_id)
+    ).all()
+    return seq, changed, list(deleted)
+
+def _open_follow_ups(query: Query) -> Query:
+    #Range on follow_up_date, status checked from the same composite index
+    return query.filter(
+        or_(models.Job.status.is_(None), models.Job.status.not_in(models.CLOSED_STATUSES))
+    )
+
+def get_follow_ups(
+    db: Session,
+    until: date,
+    since: Optional[date] = None,
+    include_closed: bool = False,
+    fields: Optional[list[str]] = None,
+) -> list[Any]:
+    """
+    Jobs whose follow-up date falls on or before `until` (and on or after
+    `since` if given, otherwise every overdue one), earliest first.
+    """
+    query = _jobs_query(db).filter(models.Job.follow_up_date <= until)
+    if since is not None:
+        query = query.filter(models.Job.follow_up_date >= since)
+    if not include_closed:
+        query = _open_follow_ups(query)
+    if fields:
+        query = _select_fields(query, fields)
+    return query.order_by(models.Job.follow_up_date, models.Job.id).all()
+
+def get_follow_up_schedule(db: Session, start: date) -> list[follow_ups.FollowUpEntry]:
+    #Open follow-ups from `start` on, used to fill the scheduler at startup
+    rows = _open_follow_ups(
+        db.query(models.Job.id, models.Job.follow_up_date, models.Job.status)
+    ).filter(models.Job.follow_up_date >= start)
+    return [tuple(row) for row in rows]
+
+#Keep IN (...) lists well under SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+T = TypeVar("T")
+
+def _chunked(items: list[T], size: int) -> Iterator[list[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _find_jobs_by_board_id(db: Session, job_board_ids: set[str]) -> dict[str, models.Job]:
+    #Set-based lookup of already stored job_board_ids
+    found: dict[str, models.Job] = {}
+    for chunk in _chunked(sorted(job_board_ids), IN_CHUNK_SIZE):
+        for row in db.scalars(select(models.Job).where(models.Job.job_board_id.in_(chunk))):
+            found[row.job_board_id] = row
+    return found
+
+def _bulk_insert(db: Session, jobs: list[schemas.JobCreate]) -> list[int]:
+    #Single executemany INSERT, ids come back in parameter order
+    if not jobs:
+        return []
+    result = db.execute(
+        insert(models.Job).returning(models.Job.id, sort_by_parameter_order=True),
+        [{**job.model_dump(), **dedup.job_keys(job)} for job in jobs],
+    )
+    ids = list(result.scalars())
+    _adjust_status_counts(db, Counter(job.status for job in jobs))
+    _adjust_activity(db, Counter(_activity_key(job) for job in jobs))
+    _record_status_events(
+        db, zip(ids, (job.status for job in jobs)), datetime.now(timezone.utc), created=True
+    )
+    _log_changes(db, ids, "created")
+    _queue_follow_ups(
+        db,
+        [(job_id, job.follow_up_date, job.status) for job_id, job in zip(ids, jobs) if job.follow_up_date],
+    )
+    return ids
+
+def _block_rows(db: Session, column: Any, keys: set[str]) -> list[Row]:
+    rows: list[Row] = []
+    for chunk in _chunked(sorted(keys), IN_CHUNK_SIZE):
+        rows += db.execute(
+            select(
+                models.Job.id,
+                models.Job.company_key,
+                models.Job.title_key,
+                models.Job.location_key,
+                models.Job.link_key,
+            ).where(column.in_(chunk)).order_by(models.Job.id)
+        ).all()
+    return rows
+
+def _find_similar_jobs(
+    db: Session, jobs: list[schemas.JobCreate], threshold: float
+) -> dict[int, Union[models.Job, int]]:
+    """
+    Fuzzy duplicate check for a payload: per input position, the stored Job
+    or the earlier input position it duplicates. Only stored rows sharing
+    a blocking key (company_key or link_key) with the payload are read.
+    """
+    incoming = [
+        SimpleNamespace(id=None, position=position, **dedup.job_keys(job))
+        for position, job in enumerate(jobs)
+    ]
+    by_link = {row.link_key for row in incoming if row.link_key}
+    by_company = {row.company_key for row in incoming if row.company_key}
+    stored = {
+        row.id: row
+        for row in [
+            *_block_rows(db, models.Job.link_key, by_link),
+            *_block_rows(db, models.Job.company_key, by_company),
+        ]
+    }
+
+    #Stored rows first (oldest first), so the original of a pair is the older row
+    rows = sorted(stored.values(), key=lambda row: row.id) + incoming
+    matches: dict[int, Any] = {}
+    first_by_link: dict[str, Any] = {}
+    for row in rows:
+        if row.link_key:
+            original = first_by_link.setdefault(row.link_key, row)
+            if original is not row and row.id is None:
+                matches.setdefault(row.position, original)
+    blocks: dict[str, list[Any]] = {}
+    for row in rows:
+        if row.company_key:
+            blocks.setdefault(row.company_key, []).append(row)
+    for block in blocks.values():
+        for original, duplicate, _ in dedup.similar_pairs(block, threshold):
+            if duplicate.id is None:
+                matches.setdefault(duplicate.position, original)
+
+    stored_ids = sorted({original.id for original in matches.values() if original.id is not None})
+    loaded = {
+        job.id: job
+        for chunk in _chunked(stored_ids, IN_CHUNK_SIZE)
+        for job in _jobs_query(db).filter(models.Job.id.in_(chunk))
+    }
+    return {
+        position: loaded[original.id] if original.id is not None else original.position
+        for position, original in matches.items()
+    }
+
+def _plan_batch(
+    db: Session, jobs: list[schemas.JobCreate], similarity: Optional[float] = None
+) -> tuple[list[schemas.JobCreate], list[Union[models.Job, int]]]:
+    #Split a payload into the rows to insert and, per input row, either the
+    #existing Job or the index of the row that will be inserted for it.
+    #With a similarity threshold, fuzzy duplicates are resolved the same way.
+    #Rows are duplicates by job_board_id (unique in the table, whatever the
+    #company): a stored one maps to that job, a repeat within the payload to
+    #the row planned for its first occurrence, so the INSERT never conflicts.
+    existing = _find_jobs_by_board_id(db, {job.job_board_id for job in jobs if job.job_board_id})
+    similar = _find_similar_jobs(db, jobs, similarity) if similarity else {}
+    to_insert: list[schemas.JobCreate] = []
+    pending: dict[str, int] = {}
+    plan: list[Union[models.Job, int]] = []
+    for position, job in enumerate(jobs):
+        match = similar.get(position)
+        if job.job_board_id in existing:
+            plan.append(existing[job.job_board_id])
+        elif job.job_board_id in pending:
+            plan.append(pending[job.job_board_id])
+        elif match is not None:
+            plan.append(match if isinstance(match, models.Job) else plan[match])
+        else:
+            if job.job_board_id:
+                pending[job.job_board_id] = len(to_insert)
+            plan.append(len(to_insert))
+            to_insert.append(job)
+    return to_insert, plan
+
+def create_jobs_batch(
+    db: Session, jobs: list[schemas.JobCreate], similarity: Optional[float] = None
+) -> list[models.Job]:
+    """
+    Bulk counterpart of create_job: duplicates are resolved with one
+    set-based lookup and all new rows are inserted in a single transaction.
+    With a similarity threshold, fuzzy duplicates (see find_duplicates)
+    are not inserted either. Returns created and existing jobs in input order.
+    """
+    to_insert, plan = _plan_batch(db, jobs, similarity)
+    new_ids = _bulk_insert(db, to_insert)
+    ids = [new_ids[ref] if isinstance(ref, int) else ref.id for ref in plan]
+    db.commit()
+
+    #Reload rows in one pass (commit expired them)
+    loaded: dict[int, models.Job] = {}
+    for chunk in _chunked(list(dict.fromkeys(ids)), IN_CHUNK_SIZE):
+        for row in _jobs_query(db).filter(models.Job.id.in_(chunk)):
+            loaded[row.id] = row
+    return [loaded[job_id] for job_id in ids]
+
+def import_jobs_chunk(db: Session, jobs: list[schemas.JobCreate]) -> tuple[int, int]:
+    """
+    Inserts one chunk of an import in its own transaction.
+    Returns (created, skipped) where skipped rows are duplicates: their
+    job_board_id is already taken, in the database or earlier in the chunk.
+    """
+    to_insert, _ = _plan_batch(db, jobs)
+    _bulk_insert(db, to_insert)
+    db.commit()
+    return len(to_insert), len(jobs) - len(to_insert)
+
+#Upserts: how a provided column is merged into an existing row
+MERGE_POLICIES = ("overwrite", "fill_missing", "keep")
+UPSERT_COLUMNS = [name for name in schemas.JobCreate.model_fields if name != "job_board_id"]
+
+class InvalidMergePolicyError(ValueError):
+    pass
+
+def parse_merge_policy(spec: Optional[str] = None) -> dict[str, str]:
+    """
+    Parses a merge spec such as "fill_missing,status:overwrite,notes:keep"
+    into a policy per column. A bare policy sets the default (overwrite).
+    """
+    default = "overwrite"
+    overrides: dict[str, str] = {}
+    for token in (spec or "").split(","):
+        name, _, policy = token.strip().rpartition(":")
+        if not policy:
+            continue
+        if policy not in MERGE_POLICIES:
+            raise InvalidMergePolicyError(f"Invalid merge policy: {policy}")
+        if name and name not in UPSERT_COLUMNS:
+            raise InvalidMergePolicyError(f"Invalid merge column: {name}")
+        if name:
+            overrides[name] = policy
+        else:
+            default = policy
+    return {name: overrides.get(name, default) for name in UPSERT_COLUMNS}
+
+def _merged_columns(provided: set[str], policy: dict[str, str]) -> list[str]:
+    return [name for name in UPSERT_COLUMNS if name in provided and policy[name] != "keep"]
+
+def _upsert(
+    db: Session, jobs: list[schemas.JobCreate], policy: dict[str, str], stamp: datetime
+) -> list[Row]:
+    #One INSERT ... ON CONFLICT(job_board_id) DO UPDATE for rows that provide
+    #the same columns. Unset columns are never merged (so the schema default
+    #status does not reset an existing one) and rows whose merge would change
+    #nothing are filtered by the WHERE clause, i.e. not returned.
+    table = models.Job.__table__
+    stmt = _dialect_insert(db)(table)
+    set_: dict[str, Any] = {}
+    for name in _merged_columns(jobs[0].model_fields_set, policy):
+        incoming = stmt.excluded[name]
+        set_[name] = incoming if policy[name] == "overwrite" else func.coalesce(table.c[name], incoming)
+    #Dedup keys follow their source column's merge
+    keys = {
+        key: stmt.excluded[key] if policy[name] == "overwrite" else func.coalesce(table.c[key], stmt.excluded[key])
+        for name, key in dedup.KEY_COLUMNS.items() if name in set_
+    }
+    if set_:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.job_board_id],
+            set_={**set_, **keys, "updated_at": stamp},
+            where=or_(*(table.c[name].is_distinct_from(value) for name, value in set_.items())),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.job_board_id])
+    #Inserted rows get created_at == updated_at == stamp, updated rows keep their created_at
+    stmt = stmt.returning(
+        table.c.id,
+        table.c.job_board_id,
+        (table.c.created_at == table.c.updated_at).label("inserted"),
+        table.c.follow_up_date,
+        table.c.status,
+    )
+    params = [
+        {**job.model_dump(), **dedup.job_keys(job), "created_at": stamp, "updated_at": stamp}
+        for job in jobs
+    ]
+    return db.execute(stmt, params).all()
+
+def upsert_jobs(
+    db: Session, jobs: list[schemas.JobCreate], policy: Optional[dict[str, str]] = None
+) -> list[schemas.UpsertResult]:
+    """
+    Inserts or merges jobs keyed on job_board_id without reading first; the
+    unique constraint decides. Rows without a job_board_id are always
+    inserted, repeated ids within one call collapse to the last row.
+    Returns one result per input row, in input order.
+    """
+    policy = policy or parse_merge_policy()
+    stamp = datetime.now(timezone.utc)
+    latest = {job.job_board_id: job for job in jobs if job.job_board_id}
+    groups: dict[frozenset[str], list[schemas.JobCreate]] = {}
+    for job in latest.values():
+        groups.setdefault(frozenset(job.model_fields_set), []).append(job)
+
+    outcomes: dict[str, tuple[int, str]] = {}
+    statuses: Counter = Counter()
+    activity: Counter = Counter()
+    updated_ids: dict[tuple[str, ...], list[int]] = {}
+    for group in groups.values():
+        merged = tuple(_merged_columns(group[0].model_fields_set, policy))
+        #Merging activity columns: swap the affected rows' old rollup keys for new ones
+        touched = [
+            models.Job.job_board_id.in_(chunk)
+            for chunk in _chunked([job.job_board_id for job in group], IN_CHUNK_SIZE)
+        ] if ACTIVITY_COLUMNS.intersection(merged) else []
+        before: Counter = Counter()
+        after: Counter = Counter()
+        for clause in touched:
+            before.update(_activity_where(db, clause))
+        rows = _upsert(db, group, policy, stamp)
+        for clause in touched:
+            after.update(_activity_where(db, clause))
+        activity.update(after)
+        activity.subtract(before)
+        if "status" in merged:
+            #The same counts per status give the status counter deltas,
+            #inserted rows included
+            for (_, _, status), count in after.items():
+                statuses[status] += count
+            for (_, _, status), count in before.items():
+                statuses[status] -= count
+        _queue_follow_ups(db, [(row.id, row.follow_up_date, row.status) for row in rows])
+        _record_status_events(db, [(row.id, row.status) for row in rows if row.inserted], stamp, created=True)
+        if "status" in merged:
+            _record_status_events(db, [(row.id, row.status) for row in rows if not row.inserted], stamp)
+        for job_id, job_board_id, inserted, _, _ in rows:
+            outcomes[job_board_id] = (job_id, "inserted" if inserted else "updated")
+            if inserted:
+                if "status" not in merged:
+                    statuses[latest[job_board_id].status] += 1
+                if not touched:
+                    activity[_activity_key(latest[job_board_id])] += 1
+            else:
+                updated_ids.setdefault(merged, []).append(job_id)
+    #Conflicting rows the WHERE clause filtered out are unchanged
+    unchanged = [key for key in latest if key not in outcomes]
+    for chunk in _chunked(unchanged, IN_CHUNK_SIZE):
+        for job_id, job_board_id in db.execute(
+            select(models.Job.id, models.Job.job_board_id).where(models.Job.job_board_id.in_(chunk))
+        ):
+            outcomes[job_board_id] = (job_id, "unchanged")
+
+    unkeyed = [job for job in jobs if not job.job_board_id]
+    new_ids = iter(_bulk_insert(db, unkeyed))
+    _adjust_status_counts(db, statuses)
+    _adjust_activity(db, activity)
+    inserted_ids = [job_id for job_id, result in outcomes.values() if result == "inserted"]
+    if inserted_ids:
+        _log_changes(db, inserted_ids, "created")
+    for merged, job_ids in updated_ids.items():
+        _log_changes(db, job_ids, "updated", list(merged))
+    db.commit()
+
+    results = []
+    for job in jobs:
+        if job.job_board_id:
+            job_id, result = outcomes[job.job_board_id]
+        else:
+            job_id, result = next(new_ids), "inserted"
+        results.append(schemas.UpsertResult(id=job_id, job_board_id=job.job_board_id, result=result))
+    return results
+
 def get_job_by_id(db: Session, job_id: int) -> Optional[models.Job]:
-    return db.query(models.Job).filter(models.Job.id == job_id).first()
+    return _jobs_query(db).filter(models.Job.id == job_id).first()
 
-def get_jobs(db: Session, skip: int = 0, limit: int = 100) -> list[models.Job]:
-    return db.query(models.Job).offset(skip).limit(limit).all()
+def get_jobs(
+    db: Session, skip: int = 0, limit: int = 100, fields: Optional[list[str]] = None
+) -> list[Any]:
+    query = _jobs_query(db)
+    if fields:
+        query = _select_fields(query, fields)
+    return query.offset(skip).limit(limit).all()
 
 def update_job(
     db: Session, job_id: int, job_update: schemas.JobUpdate
 ) -> Optional[models.Job]:
-    db_job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    db_job = _jobs_query(db).filter(models.Job.id == job_id).first()
     if not db_job:
         return None
     #Update fields if provided
     update_data = job_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
+    changed = [key for key, value in update_data.items() if getattr(db_job, key) != value]
+    old_status = db_job.status
+    old_activity = _activity_key(db_job)
+    for key in changed:
+        setattr(db_job, key, update_data[key])
+    for key, value in dedup.key_values({key: update_data[key] for key in changed}).items():
         setattr(db_job, key, value)
+    if db_job.status != old_status:
+        _adjust_status_counts(db, {old_status: -1, db_job.status: 1})
+        _record_status_events(db, [(job_id, db_job.status)], datetime.now(timezone.utc))
+    if _activity_key(db_job) != old_activity:
+        _adjust_activity(db, {old_activity: -1, _activity_key(db_job): 1})
+    if changed:
+        _log_changes(db, [job_id], "updated", changed)
+    if "follow_up_date" in changed or "status" in changed:
+        _queue_follow_ups(db, [(job_id, db_job.follow_up_date, db_job.status)])
     db.commit()
-    db.refresh(db_job)
+    _refresh_job(db, db_job)
     return db_job
 
 def delete_job(db: Session, job_id: int) -> Optional[models.Job]:
-    db_job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    db_job = _jobs_query(db).filter(models.Job.id == job_id).first()
     if not db_job:
         return None
     db.delete(db_job)
+    _adjust_status_counts(db, {db_job.status: -1})
+    _adjust_activity(db, {_activity_key(db_job): -1})
+    _log_changes(db, [job_id], "deleted")
+    _queue_follow_ups(db, [(job_id, None, None)])
     db.commit()
     return db_job
 
-#Search job by company, title, location or status
-def get_jobs_by_filters(
-    db: Session, 
+def _full_text_filter(query: Query, q: str) -> tuple[Query, bool]:
+    #Returns the filtered query and whether it can be ordered by jobs_fts.rank
+    match_query = build_match_query(q)
+    if match_query is None:
+        return query, False
+    if query.session.get_bind().dialect.name != "sqlite":
+        #No FTS5 index outside SQLite, fall back to scanning the text columns:
+        #every term has to appear, in any of them
+        return query.filter(and_(*(
+            or_(*(getattr(models.Job, name).ilike(f"%{term}%") for name in FTS_COLUMNS))
+            for term in re.findall(r"\w+", q)
+        ))), False
+    query = query.join(jobs_fts, jobs_fts.c.rowid == models.Job.id)
+    return query.filter(literal_column(FTS_TABLE).match(match_query)), True
+
+def _filter_jobs(
+    query: Query,
     company: Optional[str] = None,
     title: Optional[str] = None,
     location: Optional[str] = None,
     status: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
-    sort_by: str = "applied_date",
-    sort_desc: bool = True
-) -> list[models.Job]:
-    query = db.query(models.Job)
+    q: Optional[str] = None,
+) -> Query:
+    if q:
+        query, _ = _full_text_filter(query, q)
     if company:
         query = query.filter(models.Job.company.ilike(f"%{company}%"))
     if title:
@@ -84,11 +944,356 @@ def get_jobs_by_filters(
         query = query.filter(models.Job.location.ilike(f"%{location}%"))
     if status:
         query = query.filter(models.Job.status.ilike(f"%{status}%"))
+    return query
 
-    #Sorting
-    if hasattr(models.Job, sort_by):
-        column = getattr(models.Job, sort_by)
-        if sort_desc: 
-            column = column.desc()
-        query = query.order_by(column)
+#Search job by company, title, location or status
+def get_jobs_by_filters(
+    db: Session, 
+    company: Optional[str] = None,
+    title: Optional[str] = None,
+    location: Optional[str] = None,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: Optional[str] = None,
+    sort_desc: bool = True,
+    q: Optional[str] = None,
+    fields: Optional[list[str]] = None,
+    include_archived: bool = False,
+) -> list[Any]:
+    if include_archived:
+        return _search_with_archive(
+            db, company, title, location, status, skip, limit, sort_by, sort_desc, q, fields
+        )
+    query = _filter_jobs(_jobs_query(db), company, title, location, status)
+    ranked = False
+    if q:
+        query, ranked = _full_text_filter(query, q)
+
+    #Sorting: full-text matches default to relevance, everything else to applied_date
+    if sort_by is None and ranked:
+        query = query.order_by(jobs_fts.c.rank)
+    else:
+        sort_by = sort_by or "applied_date"
+        if hasattr(models.Job, sort_by):
+            column = getattr(models.Job, sort_by)
+            if sort_desc: 
+                column = column.desc()
+            query = query.order_by(column)
+    if fields:
+        query = _select_fields(query, fields)
     return query.offset(skip).limit(limit).all()
+
+def _search_with_archive(
+    db: Session,
+    company: Optional[str],
+    title: Optional[str],
+    location: Optional[str],
+    status: Optional[str],
+    skip: int,
+    limit: int,
+    sort_by: Optional[str],
+    sort_desc: bool,
+    q: Optional[str],
+    fields: Optional[list[str]],
+) -> list[Row]:
+    #UNION ALL of hot and archived matches, sorted and paged as one list.
+    #Relevance is not comparable across the two, so q sorts by applied_date.
+    sort_by = sort_by or "applied_date"
+    names = list(dict.fromkeys([*(fields or ARCHIVED_COLUMNS), "id", sort_by]))
+    hot = _filter_jobs(db.query(*(getattr(models.Job, name) for name in names)), company, title, location, status, q)
+    both = union_all(hot.statement, _archived_jobs_select(names, company, title, location, status, q)).subquery()
+    order = [both.c[sort_by], both.c.id]
+    stmt = select(*(both.c[name] for name in names)).order_by(
+        *(column.desc() for column in order) if sort_desc else order
+    )
+    return db.execute(stmt.offset(skip).limit(limit)).all()
+
+def get_export_statement(
+    db: Session,
+    fields: list[str],
+    company: Optional[str] = None,
+    title: Optional[str] = None,
+    location: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+) -> Select:
+    #Plain column SELECT in id order; the caller streams it
+    query = _filter_jobs(_jobs_query(db), company, title, location, status, q)
+    return _select_fields(query, fields).order_by(models.Job.id).statement
+
+def _selection_clauses(db: Session, selection: schemas.JobSelection) -> Iterator[Any]:
+    #WHERE clauses that together cover the selected rows: the filters become
+    #one id subquery, explicit ids are split into IN chunks
+    filtered = None
+    if selection.filters():
+        ids = _filter_jobs(db.query(models.Job.id), **selection.filters())
+        filtered = models.Job.id.in_(ids.statement)
+    if selection.ids is None:
+        yield filtered
+        return
+    for chunk in _chunked(sorted(set(selection.ids)), IN_CHUNK_SIZE):
+        clause = models.Job.id.in_(chunk)
+        yield clause if filtered is None else and_(clause, filtered)
+
+def _status_counts_where(db: Session, clause: Any) -> dict[Optional[str], int]:
+    rows = db.execute(
+        select(models.Job.status, func.count()).where(clause).group_by(models.Job.status)
+    )
+    return dict(rows.tuples().all())
+
+def bulk_update_jobs(
+    db: Session, selection: schemas.JobSelection, job_update: schemas.JobUpdate
+) -> int:
+    """
+    Applies the same changes to every selected job with set-based UPDATE
+    statements (one per chunk of ids) in a single transaction.
+    Returns the number of updated rows.
+    """
+    changes = job_update.model_dump(exclude_unset=True)
+    values = {**changes, **dedup.key_values(changes)}
+    stamp = datetime.now(timezone.utc)
+    deltas: Counter = Counter()
+    activity: Counter = Counter()
+    job_ids: list[int] = []
+    for clause in _selection_clauses(db, selection):
+        if "status" in values:
+            for status, count in _status_counts_where(db, clause).items():
+                deltas[status] -= count
+                deltas[values["status"]] += count
+        if ACTIVITY_COLUMNS.intersection(values):
+            #Read before the update: the clause may filter on a changed column
+            for (applied_date, source, status), count in _activity_where(db, clause).items():
+                activity[(applied_date, source, status)] -= count
+                activity[(
+                    values.get("applied_date", applied_date),
+                    values.get("source", source),
+                    values.get("status", status),
+                )] += count
+        rows = db.execute(
+            update(models.Job).where(clause).values(**values).returning(
+                models.Job.id, models.Job.follow_up_date, models.Job.status
+            ),
+            execution_options={"synchronize_session": False},
+        ).all()
+        job_ids += [row.id for row in rows]
+        if "status" in values:
+            _record_status_events(db, [(row.id, row.status) for row in rows], stamp)
+        if "follow_up_date" in values or "status" in values:
+            _queue_follow_ups(db, rows)
+    if job_ids:
+        _adjust_status_counts(db, deltas)
+        _adjust_activity(db, activity)
+        _log_changes(db, job_ids, "updated", list(changes))
+    db.commit()
+    return len(job_ids)
+
+def bulk_delete_jobs(db: Session, selection: schemas.JobSelection) -> int:
+    """
+    Deletes every selected job with set-based DELETE statements in a
+    single transaction. Returns the number of deleted rows.
+    """
+    deltas: Counter = Counter()
+    activity: Counter = Counter()
+    job_ids: list[int] = []
+    for clause in _selection_clauses(db, selection):
+        for status, count in _status_counts_where(db, clause).items():
+            deltas[status] -= count
+        activity.subtract(_activity_where(db, clause))
+        job_ids += db.scalars(
+            delete(models.Job).where(clause).returning(models.Job.id),
+            execution_options={"synchronize_session": False},
+        )
+    if job_ids:
+        _adjust_status_counts(db, deltas)
+        _adjust_activity(db, activity)
+        _log_changes(db, job_ids, "deleted")
+        _queue_follow_ups(db, [(job_id, None, None) for job_id in job_ids])
+    db.commit()
+    return len(job_ids)
+
+def find_duplicates(
+    db: Session, threshold: float = dedup.DEFAULT_THRESHOLD
+) -> list[schemas.DuplicatePair]:
+    """
+    Scans all jobs for likely duplicates: the same canonical job_link, or
+    the same normalized company with similar titles and compatible
+    locations. Rows are only compared within a company_key block, read in
+    index order one block at a time. Each pair names the newer job and
+    the older one it duplicates.
+    """
+    pairs: dict[tuple[int, int], schemas.DuplicatePair] = {}
+    repeated_links = (
+        select(models.Job.link_key)
+        .where(models.Job.link_key.is_not(None))
+        .group_by(models.Job.link_key)
+        .having(func.count() > 1)
+    )
+    rows = db.execute(
+        select(models.Job.link_key, models.Job.id)
+        .where(models.Job.link_key.in_(repeated_links))
+        .order_by(models.Job.link_key, models.Job.id)
+    )
+    for _, group in groupby(rows, key=lambda row: row.link_key):
+        original, *duplicates = [row.id for row in group]
+        for job_id in duplicates:
+            pairs[(original, job_id)] = schemas.DuplicatePair(
+                id=job_id, duplicate_of=original, score=1.0, reason="link"
+            )
+
+    rows = db.execute(
+        select(models.Job.company_key, models.Job.id, models.Job.title_key, models.Job.location_key)
+        .where(models.Job.company_key.is_not(None))
+        .order_by(models.Job.company_key, models.Job.id),
+        execution_options={"yield_per": 2000},
+    )
+    for _, group in groupby(rows, key=lambda row: row.company_key):
+        for original, duplicate, score in dedup.similar_pairs(list(group), threshold):
+            pairs.setdefault(
+                (original.id, duplicate.id),
+                schemas.DuplicatePair(
+                    id=duplicate.id, duplicate_of=original.id, score=round(score, 3), reason="title"
+                ),
+            )
+    return [pairs[key] for key in sorted(pairs)]
+
+#Job columns copied into jobs_archive
+ARCHIVED_COLUMNS = [
+    name for name in models.JobArchive.__table__.c.keys() if name not in ("archive_id", "archived_at")
+]
+
+def archive_jobs(
+    db: Session,
+    before: datetime,
+    limit: int,
+    statuses: Iterable[str] = models.CLOSED_STATUSES,
+) -> int:
+    """
+    Moves up to `limit` closed jobs last updated before `before` into
+    jobs_archive, oldest ids first, in one transaction. Clients see them
+    leave through the change feed; status counts and activity rollups keep
+    counting them. Returns the number of archived jobs.
+    """
+    job_ids = db.scalars(
+        select(models.Job.id)
+        .where(models.Job.status.in_(list(statuses)), models.Job.updated_at < before)
+        .order_by(models.Job.id)
+        .limit(limit)
+    ).all()
+    if not job_ids:
+        return 0
+    jobs = models.Job.__table__
+    archived_at = literal(datetime.now(timezone.utc), models.JobArchive.archived_at.type)
+    for chunk in _chunked(job_ids, IN_CHUNK_SIZE):
+        db.execute(
+            insert(models.JobArchive).from_select(
+                [*ARCHIVED_COLUMNS, "archived_at"],
+                select(*(jobs.c[name] for name in ARCHIVED_COLUMNS), archived_at).where(jobs.c.id.in_(chunk)),
+            )
+        )
+        db.execute(delete(jobs).where(jobs.c.id.in_(chunk)))
+    _log_changes(db, job_ids, "archived")
+    _queue_follow_ups(db, [(job_id, None, None) for job_id in job_ids])
+    db.commit()
+    return len(job_ids)
+
+def _archived_jobs_select(
+    names: Iterable[str],
+    company: Optional[str] = None,
+    title: Optional[str] = None,
+    location: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+) -> Select:
+    #Same filters as _filter_jobs over jobs_archive. The archive has no FTS
+    #index: every word of q must appear in one of the text columns.
+    archive = models.JobArchive
+    stmt = select(*(getattr(archive, name) for name in names))
+    for name, value in (("company", company), ("title", title), ("location", location), ("status", status)):
+        if value:
+            stmt = stmt.where(getattr(archive, name).ilike(f"%{value}%"))
+    for term in re.findall(r"\w+", q or ""):
+        stmt = stmt.where(or_(*(getattr(archive, name).ilike(f"%{term}%") for name in FTS_COLUMNS)))
+    return stmt
+
+class InvalidCursorError(ValueError):
+    pass
+
+def encode_cursor(sort_by: str, sort_desc: bool, value: Any, job_id: int) -> str:
+    raw = json.dumps([sort_by, sort_desc, value, job_id], default=lambda v: v.isoformat())
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str, sort_by: str, sort_desc: bool) -> tuple[Any, int]:
+    try:
+        cursor_sort_by, cursor_desc, value, job_id = json.loads(base64.urlsafe_b64decode(cursor))
+        if (cursor_sort_by, cursor_desc) != (sort_by, sort_desc) or not isinstance(job_id, int):
+            raise ValueError("cursor was issued for a different sort order")
+        sort_column = models.Job.__table__.c[sort_by]
+        if value is None and not sort_column.nullable:
+            raise ValueError(f"{sort_by} cannot be null")
+        #Restore the column's Python type (dates are serialized as ISO strings)
+        python_type = sort_column.type.python_type
+        if value is not None and python_type in (date, datetime):
+            value = python_type.fromisoformat(value)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursorError(f"Invalid cursor: {e}") from e
+    return value, job_id
+
+def _seek(column: Any, sort_desc: bool, value: Any, job_id: int) -> Any:
+    #Rows strictly after (value, id) in ORDER BY column, id
+    if value is None:
+        return models.Job.id < job_id if sort_desc else models.Job.id > job_id
+    if sort_desc:
+        return or_(column < value, and_(column == value, models.Job.id < job_id))
+    return or_(column > value, and_(column == value, models.Job.id > job_id))
+
+def get_jobs_page(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    sort_by: str = "id",
+    sort_desc: bool = False,
+    company: Optional[str] = None,
+    title: Optional[str] = None,
+    location: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[list[str]] = None,
+) -> tuple[list[Any], Optional[str]]:
+    """
+    Keyset pagination: seeks past the (sort column, id) pair stored in the
+    cursor instead of skipping rows, so every page costs the same.
+    Returns the page and the cursor for the next one (None on the last page).
+    """
+    if sort_by not in models.Job.__table__.c:
+        raise InvalidCursorError(f"Invalid sort field: {sort_by}")
+    column = getattr(models.Job, sort_by)
+    query = _filter_jobs(_jobs_query(db), company, title, location, status, q)
+    if fields:
+        query = _select_fields(query, fields, sort_by)
+    id_order = models.Job.id.desc() if sort_desc else models.Job.id
+    col_order = column.desc() if sort_desc else column
+
+    #NULLs sort first ascending and last descending (SQLite's default). Each
+    #segment is read with its own simple seek so the column index stays usable.
+    segments = [False] if not column.nullable else [True, False] if not sort_desc else [False, True]
+    position: Optional[tuple[Any, int]] = None
+    if cursor:
+        position = decode_cursor(cursor, sort_by, sort_desc)
+        segments = segments[segments.index(position[0] is None):]
+
+    rows: list[models.Job] = []
+    for is_null in segments:
+        segment = query.filter(column.is_(None) if is_null else column.is_not(None))
+        if position is not None and (position[0] is None) == is_null:
+            segment = segment.filter(_seek(column, sort_desc, *position))
+        order = [id_order] if is_null or sort_by == "id" else [col_order, id_order]
+        rows.extend(segment.order_by(*order).limit(limit + 1 - len(rows)).all())
+        if len(rows) > limit:
+            break
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort_by, sort_desc, getattr(last, sort_by), last.id)
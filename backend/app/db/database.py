@@ -1,14 +1,202 @@
-from sqlalchemy import create_engine
+import os
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import Column, Connection, Engine, MetaData, Table, create_engine, event, func, inspect, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.schema import CreateTable
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./jobs.db"
+DEFAULT_DATABASE_URL = "sqlite:///./jobs.db"
+
+# Async drivers used for the AsyncSession path
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+# Named SQLite pragma sets, applied to every new connection.
+# "wal" lets readers keep going while an import is writing.
+SQLITE_PROFILES: dict[str, dict[str, Any]] = {
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,  # negative = KiB, i.e. 64 MB
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+    },
+    # SQLite defaults: rollback journal, synchronous=FULL
+    "legacy": {},
+}
+
+
+@dataclass
+class DatabaseSettings:
+    url: str = DEFAULT_DATABASE_URL
+    pool_size: int = 5
+    max_overflow: int = 10
+    sqlite_profile: str = "wal"
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        return cls(
+            url=os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL),
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            sqlite_profile=os.getenv("SQLITE_PROFILE", "wal"),
+        )
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    database = parsed.database
+    #Also "file:name?mode=memory&uri=true" (a named, shareable in-memory database)
+    return not database or database == ":memory:" or parsed.query.get("mode") == "memory"
+
+
+def _engine_options(settings: DatabaseSettings) -> dict[str, Any]:
+    url = make_url(settings.url)
+    options: dict[str, Any] = {}
+    if url.get_backend_name() == "sqlite":
+        if settings.sqlite_profile not in SQLITE_PROFILES:
+            raise ValueError(
+                f"Unknown SQLITE_PROFILE {settings.sqlite_profile!r}, "
+                f"expected one of {', '.join(SQLITE_PROFILES)}"
+            )
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_memory_sqlite(settings.url):
+            return options
+    options["pool_size"] = settings.pool_size
+    options["max_overflow"] = settings.max_overflow
+    return options
+
+
+def _install_sqlite_pragmas(engine: Engine, profile: str) -> None:
+    pragmas = SQLITE_PROFILES[profile]
+
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_db_engine(settings: Optional[DatabaseSettings] = None, **kwargs: Any) -> Engine:
+    """
+    Builds an engine from settings (environment by default). SQLite
+    connections get the pragmas of the configured profile.
+    """
+    settings = settings or DatabaseSettings.from_env()
+    options = _engine_options(settings)
+    options.update(kwargs)
+    engine = create_engine(settings.url, **options)
+    if engine.dialect.name == "sqlite":
+        _install_sqlite_pragmas(engine, settings.sqlite_profile)
+    return engine
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def async_database_url(url: str) -> str:
+    """Swaps the sync driver for its async counterpart (aiosqlite, asyncpg)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} databases")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+def create_async_db_engine(settings: Optional[DatabaseSettings] = None, **kwargs: Any) -> AsyncEngine:
+    settings = settings or DatabaseSettings.from_env()
+    options = _engine_options(settings)
+    options.update(kwargs)
+    engine = create_async_engine(async_database_url(settings.url), **options)
+    if engine.dialect.name == "sqlite":
+        _install_sqlite_pragmas(engine.sync_engine, settings.sqlite_profile)
+    return engine
+
+
+def add_missing_columns(connection: Connection, table: Table) -> list[str]:
+    """
+    Adds model columns missing from an existing table (create_all only
+    creates whole tables). Only nullable columns without server defaults
+    can be added this way. Returns the names of the added columns.
+    """
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    added = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}')
+        added.append(column.name)
+    return added
+
+
+def rebuild_with_autoincrement(
+    connection: Connection, table: Table, floor_columns: Iterable[Column] = ()
+) -> bool:
+    """
+    Rebuilds a SQLite table created without AUTOINCREMENT (the key can then
+    be reused after deletes) from its model definition, which must have
+    sqlite_autoincrement=True. New keys start past the largest value in the
+    table and in floor_columns. Indexes and triggers on the table are
+    dropped with it; the caller recreates them. Returns True if rebuilt.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    sql = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": table.name},
+    ).scalar()
+    if sql is None or "AUTOINCREMENT" in sql.upper():
+        return False
+    rebuild = table.to_metadata(MetaData(), name=f"{table.name}_rebuild")
+    columns = ", ".join(f'"{column.name}"' for column in table.columns)
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {rebuild.name}")
+    connection.execute(CreateTable(rebuild))
+    connection.exec_driver_sql(f"INSERT INTO {rebuild.name} ({columns}) SELECT {columns} FROM {table.name}")
+    connection.exec_driver_sql(f"DROP TABLE {table.name}")
+    connection.exec_driver_sql(f"ALTER TABLE {rebuild.name} RENAME TO {table.name}")
+    for index in table.indexes:
+        index.create(bind=connection, checkfirst=True)
+    floor = max(
+        [connection.execute(select(func.max(column))).scalar() or 0 for column in floor_columns],
+        default=0,
+    )
+    connection.execute(
+        text("UPDATE sqlite_sequence SET seq = max(seq, :floor) WHERE name = :name"),
+        {"floor": floor, "name": table.name},
+    )
+    connection.execute(
+        text(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT :name, :floor "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :name)"
+        ),
+        {"floor": floor, "name": table.name},
+    )
+    return True
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine )
 
+async_engine = create_async_db_engine()
+
+# expire_on_commit=False: attributes must stay loaded for serialization
+# after the request's session work is done
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 # Dependency
 def get_db():
@@ -17,3 +205,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async dependency
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
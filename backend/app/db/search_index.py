@@ -0,0 +1,81 @@
+import re
+from typing import Optional
+
+from sqlalchemy import Connection, text
+
+# SQLite FTS5 index over the free-text job columns.
+# External-content table: the text lives only in `jobs`, triggers keep the index in sync.
+FTS_TABLE = "jobs_fts"
+FTS_COLUMNS = ["title", "company", "location", "job_description", "notes"]
+# bm25 column weights, in FTS_COLUMNS order
+FTS_RANK = "bm25(10.0, 8.0, 4.0, 1.0, 1.0)"
+
+_columns = ", ".join(FTS_COLUMNS)
+_new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+_old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+_CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+    {_columns},
+    content='jobs', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+)
+"""
+
+_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON jobs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_columns} ON jobs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END
+    """,
+]
+
+
+def install_search_index(connection: Connection) -> None:
+    """
+    Creates the FTS table and its sync triggers if missing, indexing any
+    rows already in `jobs`. No-op on non-SQLite databases.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+    if not exists:
+        connection.execute(text(_CREATE_TABLE))
+        connection.execute(
+            text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', :rank)"),
+            {"rank": FTS_RANK},
+        )
+        connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    for trigger in _TRIGGERS:
+        connection.execute(text(trigger))
+
+
+def drop_search_index(connection: Connection) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """
+    Turns free text into an FTS5 query: every word must match, as a prefix
+    ("back eng" finds "Backend Engineer"). Returns None if q has no words.
+    """
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
@@ -1,13 +1,65 @@
+from contextlib import asynccontextmanager
+from datetime import date
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .db.database import Base, engine
+from .db.database import (
+    AsyncSessionLocal,
+    Base,
+    SessionLocal,
+    add_missing_columns,
+    async_engine,
+    engine,
+    rebuild_with_autoincrement,
+)
+from .db.search_index import install_search_index
+from .crud import async_crud, crud
+from .models import models
 from .routers import jobs, gmail
+from .services import archival, follow_ups
 
 #Create database tables if not already created
 Base.metadata.create_all(bind=engine)
+#create_all skips columns and indexes added to tables that already exist
+with engine.begin() as connection:
+    add_missing_columns(connection, models.Job.__table__)
+    #Older databases reuse job ids; new ids start past any archived or deleted one
+    rebuild_with_autoincrement(
+        connection, models.Job.__table__, [models.JobArchive.id, models.JobChange.job_id]
+    )
+for index in models.Job.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+with engine.begin() as connection:
+    install_search_index(connection)
+with SessionLocal() as db:
+    crud.ensure_status_counts(db)
+    crud.ensure_change_log(db)
+    crud.ensure_dedup_keys(db)
+    crud.ensure_status_history(db)
+    crud.ensure_activity_counts(db)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    #One read fills the reminder heap; writes keep it current from then on
+    async with AsyncSessionLocal() as db:
+        schedule = await async_crud.get_follow_up_schedule(db, date.today())
+    follow_ups.scheduler.start(schedule)
+
+    #Closed jobs move to jobs_archive in the background, one short
+    #transaction per batch
+    async def archive_batch(before, limit):
+        async with AsyncSessionLocal() as db:
+            return await async_crud.archive_jobs(db, before, limit)
+    archiver = archival.Archiver(archive_batch, archival.settings)
+    archiver.start()
+    yield
+    await archiver.stop()
+    await follow_ups.scheduler.stop()
+    #Pooled aiosqlite connections run on their own threads, close them on shutdown
+    await async_engine.dispose()
+    gmail.shutdown_gmail_executor()
 
 #Initialize app
-app = FastAPI(title="Job Applications Tracker API", version="1.0")
+app = FastAPI(title="Job Applications Tracker API", version="1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,6 +67,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 #Register Routers
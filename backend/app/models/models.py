@@ -1,14 +1,27 @@
 from datetime import date, datetime, timezone
 from typing import Optional
 
-from sqlalchemy import Date, DateTime, Integer, String
+from sqlalchemy import Boolean, Date, DateTime, Index, Integer, String, event
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..db.database import Base
+from ..db.search_index import drop_search_index, install_search_index
+
+# Statuses that end an application: no follow-ups, archived once old enough
+CLOSED_STATUSES = ("Rejected", "Withdrawn")
 
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Follow-up reminders: date range scan, open/closed status read from the index
+        Index("ix_jobs_follow_up_date_status", "follow_up_date", "status"),
+        # Duplicate scans: one block per company_key, read in order from the index
+        Index("ix_jobs_dedup_block", "company_key", "title_key", "location_key"),
+        # Never reuse the id of a deleted or archived job: the change feed,
+        # status history and jobs_archive all refer to jobs by id
+        {"sqlite_autoincrement": True},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String, nullable=False)
@@ -18,11 +31,17 @@ class Job(Base):
     applied_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True, index=True)
     follow_up_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     job_link: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    job_description: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Pasted posting text can be large; only loaded when asked for
+    job_description: Mapped[Optional[str]] = mapped_column(String, nullable=True, deferred=True)
     resume_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     job_board_id: Mapped[Optional[str]] = mapped_column(String, unique=True, nullable=True, index=True)
     source: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     notes: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Normalized duplicate-detection keys (services/dedup.py), kept current by the crud write paths
+    company_key: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    title_key: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    location_key: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    link_key: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -33,3 +52,121 @@ class Job(Base):
         default=lambda: datetime.now(timezone.utc),
         onupdate=lambda: datetime.now(timezone.utc),
     )
+
+
+
+
+class JobArchive(Base):
+    """
+    Cold storage for closed jobs moved out of `jobs` by the archiver. Same
+    columns as Job; archive_id is the key since databases created before
+    jobs.id used AUTOINCREMENT may hold reused job ids.
+    """
+    __tablename__ = "jobs_archive"
+
+    archive_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    company: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    location: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    applied_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True, index=True)
+    follow_up_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    job_link: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    job_description: Mapped[Optional[str]] = mapped_column(String, nullable=True, deferred=True)
+    resume_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    job_board_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    source: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    notes: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+# Keep the full-text index alongside the jobs table
+@event.listens_for(Job.__table__, "after_create")
+def _create_job_search_index(target, connection, **kw) -> None:
+    install_search_index(connection)
+
+
+@event.listens_for(Job.__table__, "before_drop")
+def _drop_job_search_index(target, connection, **kw) -> None:
+    drop_search_index(connection)
+
+
+class JobStatusCount(Base):
+    """Per-status job counters kept up to date by the crud write paths."""
+    __tablename__ = "job_status_counts"
+
+    # Jobs without a status are counted under ""
+    status: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class DataVersion(Base):
+    """Single-row counter bumped by every write to jobs (drives list ETags)."""
+    __tablename__ = "data_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class JobChange(Base):
+    """
+    Change feed: the data version at which each job last changed.
+    Deleted jobs keep a tombstone row.
+    """
+    __tablename__ = "job_changes"
+
+    job_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    deleted: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+
+class JobStatusEvent(Base):
+    """
+    Append-only status history. from_status is NULL on a job's first event,
+    so a reused job id starts a new chain. Jobs without a status use "".
+    """
+    __tablename__ = "job_status_events"
+    __table_args__ = (
+        # Latest event per job: max(id) within job_id
+        Index("ix_job_status_events_job_id_id", "job_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    from_status: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class JobStatusTransition(Base):
+    """Funnel rollup: how many jobs moved from one status to the next ("" = created)."""
+    __tablename__ = "job_status_transitions"
+
+    from_status: Mapped[str] = mapped_column(String, primary_key=True)
+    to_status: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class JobStatusDwell(Base):
+    """Funnel rollup: histogram of whole hours spent in a status before leaving it."""
+    __tablename__ = "job_status_dwell"
+
+    status: Mapped[str] = mapped_column(String, primary_key=True)
+    hours: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class JobActivityCount(Base):
+    """
+    Application activity rollup: jobs per applied_date bucket, source and
+    current status, kept for each granularity. Missing source/status use "".
+    """
+    __tablename__ = "job_activity_counts"
+
+    granularity: Mapped[str] = mapped_column(String, primary_key=True)
+    bucket: Mapped[date] = mapped_column(Date, primary_key=True)
+    source: Mapped[str] = mapped_column(String, primary_key=True)
+    status: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -1,42 +1,83 @@
+import asyncio
+import functools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
 from fastapi import APIRouter, Request, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from ..services import gmail_quota
 from ..services.gmail_client import (
+    GmailFetchIncomplete,
+    GmailRateLimited,
     get_authorize_url,
     exchange_code_and_save_tokens,
     fetch_job_applications_from_gmail,
     get_valid_credentials,
+    iter_job_applications_from_gmail,
     load_credentials,
     resolve_redirect_uri,
+    shutdown_fetch_pool,
+    sync_job_applications,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/gmail", tags=["Gmail"])
 callback_router = APIRouter(tags=["Gmail"])
 
+# The Google client is blocking. Gmail calls get their own small thread pool
+# so slow mailbox scans never occupy the threads other requests rely on.
+GMAIL_MAX_WORKERS = 4
+_gmail_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_gmail_executor() -> ThreadPoolExecutor:
+    global _gmail_executor
+    if _gmail_executor is None:
+        _gmail_executor = ThreadPoolExecutor(max_workers=GMAIL_MAX_WORKERS, thread_name_prefix="gmail")
+    return _gmail_executor
+
+
+def shutdown_gmail_executor() -> None:
+    global _gmail_executor
+    if _gmail_executor is not None:
+        _gmail_executor.shutdown(wait=False, cancel_futures=True)
+        _gmail_executor = None
+    shutdown_fetch_pool()
 
-def _gmail_redirect_uri(request: Request) -> str:
-    return resolve_redirect_uri(str(request.url_for("gmail_callback")))
+
+async def _run_gmail(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_gmail_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def _gmail_redirect_uri(request: Request) -> str:
+    return await _run_gmail(resolve_redirect_uri, str(request.url_for("gmail_callback")))
 
 # Generate authorization URL
 @router.get("/auth/url")
-def get_auth_url(request: Request):
+async def get_auth_url(request: Request):
     """
     Generates a Google OAuth URL for the user to grant Gmail access.
     """
-    redirect_uri = _gmail_redirect_uri(request)
+    redirect_uri = await _gmail_redirect_uri(request)
     try:
-        url = get_authorize_url(redirect_uri)
+        url = await _run_gmail(get_authorize_url, redirect_uri)
         return {"auth_url": url}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def _handle_gmail_callback(request: Request, code: str):
+async def _handle_gmail_callback(request: Request, code: str):
     """
     Handles OAuth callback after the user authorizes the app.
     Exchanges code for token and saves credentials.json.
     """
-    redirect_uri = _gmail_redirect_uri(request)
+    redirect_uri = await _gmail_redirect_uri(request)
     try:
-        creds = exchange_code_and_save_tokens(code, redirect_uri)
+        creds = await _run_gmail(exchange_code_and_save_tokens, code, redirect_uri)
         return {"message": "Authorization successful!", "credentials": creds}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OAuth failed: {str(e)}")
@@ -44,26 +85,26 @@ def _handle_gmail_callback(request: Request, code: str):
 
 # Callback endpoint for OAuth
 @router.get("/auth/callback", name="gmail_callback")
-def gmail_callback(request: Request, code: str):
-    return _handle_gmail_callback(request, code)
+async def gmail_callback(request: Request, code: str):
+    return await _handle_gmail_callback(request, code)
 
 
 @callback_router.get("/external/auth/callback")
-def gmail_callback_alias(request: Request, code: str):
-    return _handle_gmail_callback(request, code)
+async def gmail_callback_alias(request: Request, code: str):
+    return await _handle_gmail_callback(request, code)
 
 
 # Check connection status
 @router.get("/status")
-def gmail_status():
+async def gmail_status():
     """
     Checks whether valid Gmail credentials are available.
     """
-    creds = load_credentials()
+    creds = await _run_gmail(load_credentials)
     if creds is None:
         return {"authorized": False, "message": "No credentials found."}
     try:
-        valid_creds = get_valid_credentials()
+        valid_creds = await _run_gmail(get_valid_credentials)
     except Exception as exc:
         return {
             "authorized": False,
@@ -76,7 +117,7 @@ def gmail_status():
 
 # Fetch job candidates
 @router.get("/jobs")
-def get_jobs_from_gmail(
+async def get_jobs_from_gmail(
     query: str = Query(
         "applied OR 'thank you for your application' newer_than:365d",
         description="Gmail search query to filter job-related emails",
@@ -87,7 +128,89 @@ def get_jobs_from_gmail(
     Fetch job application emails and parse possible job candidates.
     """
     try:
-        jobs = fetch_job_applications_from_gmail(query=query, max_results=max_results)
+        jobs = await _run_gmail(fetch_job_applications_from_gmail, query=query, max_results=max_results)
         return {"count": len(jobs), "jobs": jobs}
+    except GmailRateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "60"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch Gmail jobs: {str(e)}")
+
+
+#Marks an exhausted candidate stream
+_DONE = object()
+
+
+async def _iter_gmail_ndjson(first: Any, candidates: Iterator[dict[str, str]]) -> AsyncIterator[bytes]:
+    #Each step of the blocking pipeline runs on the Gmail pool
+    candidate = first
+    try:
+        while candidate is not _DONE:
+            yield json.dumps(candidate).encode() + b"\n"
+            candidate = await _run_gmail(next, candidates, _DONE)
+    except Exception:
+        #Headers are already sent; end the stream and leave the cause in the log
+        logger.exception("Gmail job stream failed")
+
+
+# Stream job candidates for a whole mailbox
+@router.get("/jobs/stream", response_class=StreamingResponse)
+async def stream_jobs_from_gmail(
+    query: str = Query(
+        "applied OR 'thank you for your application' newer_than:365d",
+        description="Gmail search query to filter job-related emails",
+    ),
+    max_results: Optional[int] = Query(None, ge=1, description="Messages to scan; all matches when omitted"),
+):
+    """
+    Streams job candidates as NDJSON while the mailbox is paged through,
+    for backfills too large for /gmail/jobs.
+    """
+    candidates = iter_job_applications_from_gmail(query, max_results=max_results)
+    #Credentials, throttling and API errors mostly surface on the first
+    #step; take it before the 200 goes out so they get a proper status
+    try:
+        await _run_gmail(get_valid_credentials)
+        first = await _run_gmail(next, candidates, _DONE)
+    except GmailRateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "60"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch Gmail jobs: {str(e)}")
+    return StreamingResponse(_iter_gmail_ndjson(first, candidates), media_type="application/x-ndjson")
+
+
+# Sync job candidates incrementally
+@router.post("/sync")
+async def sync_jobs_from_gmail(
+    query: str = Query(
+        "applied OR 'thank you for your application' newer_than:365d",
+        description="Gmail search query to filter job-related emails",
+    ),
+    full: bool = Query(False, description="Ignore the stored checkpoint and rescan every match"),
+):
+    """
+    Returns job candidates from mail received since the last sync, using
+    the stored mailbox history checkpoint. The first sync for a query (or
+    one whose checkpoint expired) scans every match.
+    """
+    try:
+        result = await _run_gmail(sync_job_applications, query, full=full)
+    except GmailRateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "60"})
+    except GmailFetchIncomplete as e:
+        #The checkpoint was kept, so retrying picks up the same messages
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "60"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to sync Gmail jobs: {str(e)}")
+    return {"mode": result["mode"], "history_id": result["history_id"], "count": len(result["jobs"]), "jobs": result["jobs"]}
+
+
+# Fetch throughput and throttling counters
+@router.get("/stats")
+async def gmail_fetch_stats():
+    """
+    Counters for Gmail calls since startup: requests, quota units spent,
+    throttled responses, retries and the time spent waiting for quota.
+    """
+    stats = gmail_quota.stats.snapshot()
+    stats["quota_rate"] = gmail_quota.limiter.rate
+    return stats
@@ -1,39 +1,238 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import dataclasses
+import hashlib
+from datetime import date
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional
-from ..db.database import get_db
-from ..crud import crud
+from collections import Counter
+from typing import Any, Literal, Optional, Union
+from ..db.database import get_async_db, get_db
+from ..crud import async_crud, crud
 from ..schemas import schemas
 from ..models import models
+from ..services import archival, dedup, fast_json, job_events, job_export, job_import
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
 #Create a job
 @router.post("/", response_model=schemas.Job)
-def create_job_route(job: schemas.JobCreate, db: Session = Depends(get_db)):
-    return crud.create_job(db=db, job=job)
+async def create_job_route(job: schemas.JobCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_job(db=db, job=job)
+
+CURSOR_DESCRIPTION = (
+    "Opaque keyset cursor. Pass an empty value for the first page; "
+    "the response then carries next_cursor instead of being a plain list."
+)
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated columns to return (id is always included), "
+    "or \"summary\" for the lean list row without job_description and notes"
+)
+
+MODE_DESCRIPTION = (
+    "skip: keep existing jobs with the same company and job_board_id as they are. "
+    "upsert: merge rows into the job with the same job_board_id"
+)
+
+MERGE_DESCRIPTION = (
+    "Upsert merge policy: overwrite, fill_missing or keep, optionally per column "
+    "(e.g. \"overwrite,notes:keep\"). Columns a row does not provide are never changed"
+)
+
+SIMILARITY_DESCRIPTION = (
+    "Also skip fuzzy duplicates: rows whose normalized company matches a stored job "
+    "and whose title similarity reaches this threshold (0-1), or with the same job_link"
+)
+
+def _merge_policy(merge: Optional[str]) -> dict[str, str]:
+    try:
+        return crud.parse_merge_policy(merge)
+    except crud.InvalidMergePolicyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+#List endpoints skip ORM hydration and per-row response_model validation:
+#they select plain column tuples and encode them directly (same bytes as
+#the schemas.Job serialization)
+JOB_FIELDS = list(schemas.Job.model_fields)
+
+def _parse_fields(fields: Optional[str]) -> list[str]:
+    if not fields:
+        return JOB_FIELDS
+    if fields.strip() == "summary":
+        return list(schemas.JobSummary.model_fields)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    invalid = [name for name in names if name not in JOB_FIELDS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid field: {', '.join(invalid)}")
+    return names if "id" in names else ["id", *names]
+
+def _json_response(content: Any, etag: Optional[str] = None) -> Response:
+    response = Response(content=fast_json.dumps(content), media_type="application/json")
+    if etag:
+        _set_etag(response, etag)
+    return response
+
+#Conditional GET: list ETags derive from the global data version (bumped by
+#every write), detail ETags from the row's updated_at. The version is read
+#before the query, so a racing write can only make a tag stale, never wrong.
+def _list_etag(request: Request, version: int) -> str:
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+    return f'W/"{version}-{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    #Weak comparison: ignore W/ prefixes
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+def _set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+def _not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    _set_etag(response, etag)
+    return response
+
+async def _jobs_page(
+    db: AsyncSession,
+    cursor: str,
+    limit: int,
+    etag: str,
+    fields: list[str],
+    **kwargs: Any,
+) -> Response:
+    try:
+        rows, next_cursor = await async_crud.get_jobs_page(
+            db, cursor=cursor, limit=limit, fields=fields, **kwargs
+        )
+    except crud.InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _json_response(
+        {"items": fast_json.rows_to_dicts(rows, fields), "next_cursor": next_cursor}, etag
+    )
 
 #Return all jobs with pagination
-@router.get("/", response_model=list[schemas.Job])
-def read_jobs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    jobs = crud.get_jobs(db, skip=skip, limit=limit)
-    return jobs
+@router.get("/", response_model=Union[list[schemas.Job], schemas.JobPage])
+async def read_jobs(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)):
+    selected = _parse_fields(fields)
+    etag = _list_etag(request, await async_crud.get_data_version(db))
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    if cursor is not None:
+        return await _jobs_page(db, cursor, limit, etag, selected)
+    rows = await async_crud.get_jobs(db, skip=skip, limit=limit, fields=selected)
+    return _json_response(fast_json.rows_to_dicts(rows, selected), etag)
+
+#Total and per-status job counts
+@router.get("/stats", response_model=schemas.JobStats)
+async def read_job_stats(db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.get_job_stats(db)
+
+#Recompute the counters from the jobs table
+@router.post("/stats/rebuild", response_model=schemas.JobStats)
+async def rebuild_job_stats(db: AsyncSession = Depends(get_async_db)):
+    await async_crud.rebuild_status_counts(db)
+    return await async_crud.get_job_stats(db)
+
+#Status funnel: conversion between stages and median hours spent in each,
+#served from rollups kept current by every status change
+@router.get("/stats/funnel", response_model=schemas.StatusFunnel)
+async def read_status_funnel(db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.get_status_funnel(db)
+
+#Recompute the funnel rollups from the status history
+@router.post("/stats/funnel/rebuild", response_model=schemas.StatusFunnel)
+async def rebuild_status_funnel(db: AsyncSession = Depends(get_async_db)):
+    await async_crud.rebuild_status_funnel(db)
+    return await async_crud.get_status_funnel(db)
+
+#Widest window /stats/timeseries serves, in buckets
+MAX_TIMESERIES_BUCKETS = 400
+
+#Applications and responses per day, week or month of applied_date,
+#served from rollups kept current by every write
+@router.get("/stats/timeseries", response_model=schemas.JobTimeseries)
+async def read_job_timeseries(
+    granularity: Literal["day", "week", "month"] = "week",
+    start: Optional[date] = Query(None, description="Defaults to 12 buckets before end"),
+    end: Optional[date] = Query(None, description="Defaults to today"),
+    by_source: bool = Query(False, description="One point per bucket and source"),
+    source: Optional[str] = Query(None, description="Only jobs from this source"),
+    db: AsyncSession = Depends(get_async_db)):
+    end = end or date.today()
+    first = crud.bucket_start(end, granularity)
+    start = start or crud.shift_buckets(first, granularity, -11)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if crud.shift_buckets(crud.bucket_start(start, granularity), granularity, MAX_TIMESERIES_BUCKETS) <= first:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_TIMESERIES_BUCKETS} buckets per request")
+    return await async_crud.get_job_timeseries(db, granularity, start, end, by_source, source)
+
+#Recompute the activity rollups from the jobs table
+@router.post("/stats/timeseries/rebuild", status_code=204)
+async def rebuild_job_timeseries(db: AsyncSession = Depends(get_async_db)):
+    await async_crud.rebuild_activity_counts(db)
 
 #Search job by criteria
-@router.get("/search", response_model=list[schemas.Job])
-def search_jobs(
+@router.get("/search", response_model=Union[list[schemas.Job], schemas.JobPage])
+async def search_jobs(
+    request: Request,
     company: Optional[str] = None,
     title: Optional[str] = None,
     location: Optional[str] = None,
     status: Optional[str] = None,
+    q: Optional[str] = Query(
+        None, description="Full-text search over title, company, location, description and notes"
+    ),
     skip: int = 0,
     limit: int = 100,
-    sort_by: str = "applied_date",
+    sort_by: Optional[str] = Query(
+        None, description="Defaults to relevance when q is given, otherwise applied_date"
+    ),
     sort_desc: bool = True,
-    db: Session = Depends(get_db)): 
-    if not hasattr(models.Job, sort_by):
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_archived: bool = Query(False, description="Also search archived (closed, old) jobs"),
+    db: AsyncSession = Depends(get_async_db)): 
+    if sort_by is not None and sort_by not in JOB_FIELDS:
         raise HTTPException(status_code=400, detail=f"Invalid sort field: {sort_by}")
-    return crud.get_jobs_by_filters(
+    if include_archived and cursor is not None:
+        raise HTTPException(status_code=400, detail="include_archived does not support cursor paging")
+    selected = _parse_fields(fields)
+    etag = _list_etag(request, await async_crud.get_data_version(db))
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    if cursor is not None:
+        return await _jobs_page(
+            db,
+            cursor,
+            limit,
+            etag,
+            selected,
+            sort_by=sort_by or "applied_date",
+            sort_desc=sort_desc,
+            company=company,
+            title=title,
+            location=location,
+            status=status,
+            q=q,
+        )
+    rows = await async_crud.get_jobs_by_filters(
         db=db, 
         company=company, 
         title=title, 
@@ -42,38 +241,244 @@ def search_jobs(
         skip=skip,
         limit=limit,
         sort_by=sort_by,
-        sort_desc=sort_desc
+        sort_desc=sort_desc,
+        q=q,
+        fields=selected,
+        include_archived=include_archived,
+    )
+    return _json_response(fast_json.rows_to_dicts(rows, selected), etag)
+
+#Jobs created, updated or deleted since a change sequence
+@router.get("/changes", response_model=schemas.JobChanges)
+async def read_job_changes(
+    since: int = Query(0, ge=0, description="seq from the previous response, 0 for a full snapshot"),
+    db: AsyncSession = Depends(get_async_db)):
+    seq, rows, deleted = await async_crud.get_job_changes(db, since, JOB_FIELDS)
+    if since > seq:
+        raise HTTPException(status_code=410, detail="since is ahead of the server, resync from 0")
+    return _json_response({
+        "seq": seq,
+        "changed": fast_json.rows_to_dicts(rows, JOB_FIELDS),
+        "deleted": deleted,
+    })
+
+FOLLOW_UP_FIELDS = [name for name in schemas.FollowUp.model_fields if name != "overdue"]
+
+#Due and overdue follow-ups, earliest first
+@router.get("/follow-ups", response_model=list[schemas.FollowUp])
+async def read_follow_ups(
+    until: Optional[date] = Query(None, description="Last follow-up date to include, defaults to today"),
+    since: Optional[date] = Query(None, description="First date to include; omit to get everything overdue"),
+    include_closed: bool = False,
+    db: AsyncSession = Depends(get_async_db)):
+    today = date.today()
+    rows = await async_crud.get_follow_ups(
+        db, until or today, since, include_closed, FOLLOW_UP_FIELDS
     )
+    return [
+        schemas.FollowUp(**row._mapping, overdue=row.follow_up_date < today) for row in rows
+    ]
+
+#Likely duplicate jobs (same posting link, or same company with a similar
+#title and location), newest job first in each pair's `id`.
+#The scoring is CPU-bound Python, so it runs in a worker thread on a sync session
+@router.get("/duplicates", response_model=list[schemas.DuplicatePair])
+async def read_duplicates(
+    threshold: float = Query(dedup.DEFAULT_THRESHOLD, gt=0, le=1, description="Minimum title similarity"),
+    db: Session = Depends(get_db)):
+    return await run_in_threadpool(crud.find_duplicates, db, threshold)
+
+#Idle SSE connections get a comment line this often so proxies keep them open
+EVENTS_KEEPALIVE_SECONDS = 15.0
+
+def _format_event(event: dict[str, Any]) -> bytes:
+    frame = b"event: %s\ndata: %s\n\n" % (event["op"].encode(), fast_json.dumps(event))
+    return frame if event["seq"] is None else b"id: %d\n" % event["seq"] + frame
+
+async def _event_stream(subscription: job_events.Subscription) -> Any:
+    try:
+        #Tells the client the stream is live (and flushes response headers)
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield _format_event(event)
+    finally:
+        subscription.close()
+
+#Server-sent events for job mutations. Fed by the in-process broker, so an
+#idle subscriber costs no database queries. Clients that fall behind get a
+#"resync" event and catch up through /jobs/changes.
+@router.get("/events", response_class=StreamingResponse)
+async def job_event_stream():
+    return StreamingResponse(
+        _event_stream(job_events.broker.subscribe()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+#Rows fetched per round trip while exporting
+EXPORT_BATCH_SIZE = 2000
+
+#Stream all matching jobs as CSV, NDJSON or Parquet
+@router.get("/export", response_class=StreamingResponse)
+async def export_jobs(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    company: Optional[str] = None,
+    title: Optional[str] = None,
+    location: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)):
+    batches = async_crud.stream_jobs(
+        db.bind,
+        JOB_FIELDS,
+        EXPORT_BATCH_SIZE,
+        company=company,
+        title=title,
+        location=location,
+        status=status,
+        q=q,
+    )
+    types = {name: models.Job.__table__.c[name].type.python_type for name in JOB_FIELDS}
+    try:
+        body = job_export.encode_export(format, batches, JOB_FIELDS, types)
+    except job_export.ExportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        body,
+        media_type=job_export.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="jobs.{format}"'},
+    )
+
+#Import jobs from a raw CSV or NDJSON upload, committing chunk by chunk
+@router.post("/import", response_model=schemas.ImportSummary)
+async def import_jobs(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson, defaults to the Content-Type"),
+    chunk_size: int = Query(500, ge=1, le=5000),
+    mode: Literal["skip", "upsert"] = Query("skip", description=MODE_DESCRIPTION),
+    merge: Optional[str] = Query(None, description=MERGE_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)):
+    file_format = job_import.detect_format(format, request.headers.get("content-type"))
+    if file_format is None:
+        raise HTTPException(status_code=415, detail="Unsupported file type. Upload CSV or NDJSON")
+    policy = _merge_policy(merge)
+    summary = schemas.ImportSummary()
+    try:
+        chunks = job_import.iter_import_chunks(request.stream(), file_format, chunk_size)
+        async for jobs, errors, invalid in chunks:
+            chunk = schemas.ImportChunkSummary(
+                chunk=len(summary.chunks) + 1, created=0, skipped=0, invalid=invalid, errors=errors
+            )
+            if mode == "upsert":
+                results = Counter(r.result for r in await async_crud.upsert_jobs(db, jobs, policy))
+                chunk.created = results["inserted"]
+                chunk.updated = results["updated"]
+                chunk.unchanged = results["unchanged"]
+            else:
+                chunk.created, chunk.skipped = await async_crud.import_jobs_chunk(db, jobs)
+            summary.created += chunk.created
+            summary.skipped += chunk.skipped
+            summary.updated += chunk.updated
+            summary.unchanged += chunk.unchanged
+            summary.invalid += chunk.invalid
+            summary.chunks.append(chunk)
+    except job_import.ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return summary
+
+def _require_selection(selection: schemas.JobSelection) -> None:
+    #An empty selection would match every job
+    if selection.is_empty():
+        raise HTTPException(status_code=400, detail="Select jobs by ids or at least one filter")
+
+#Archive closed jobs now instead of waiting for the background archiver
+@router.post("/archive", response_model=schemas.BulkResult)
+async def archive_jobs(
+    older_than_days: Optional[int] = Query(
+        None, ge=0, description="Defaults to ARCHIVE_AFTER_DAYS (90)"
+    ),
+    db: AsyncSession = Depends(get_async_db)):
+    settings = archival.settings
+    if older_than_days is not None:
+        settings = dataclasses.replace(settings, after_days=older_than_days)
+    archived = await archival.archive_closed_jobs(
+        lambda before, limit: async_crud.archive_jobs(db, before, limit), settings
+    )
+    return schemas.BulkResult(affected=archived)
+
+#Update all selected jobs (ids and/or search filters) in one transaction
+@router.patch("/bulk", response_model=schemas.BulkResult)
+async def bulk_update_jobs_route(payload: schemas.JobBulkUpdate, db: AsyncSession = Depends(get_async_db)):
+    _require_selection(payload)
+    if not payload.changes.model_fields_set:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    try:
+        affected = await async_crud.bulk_update_jobs(db, payload, payload.changes)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Update would duplicate a job_board_id")
+    return schemas.BulkResult(affected=affected)
+
+#Delete all selected jobs in one transaction
+@router.delete("/bulk", response_model=schemas.BulkResult)
+async def bulk_delete_jobs_route(selection: schemas.JobSelection, db: AsyncSession = Depends(get_async_db)):
+    _require_selection(selection)
+    affected = await async_crud.bulk_delete_jobs(db, selection)
+    return schemas.BulkResult(affected=affected)
 
 #Get single job
 @router.get("/{job_id}", response_model=schemas.Job)
-def read_job(job_id: int, db: Session = Depends(get_db)):
-    job = crud.get_job_by_id(db, job_id)
+async def read_job(
+    job_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)):
+    updated_at = await async_crud.get_job_updated_at(db, job_id)
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    etag = f'W/"{job_id}-{updated_at.isoformat()}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    job = await async_crud.get_job_by_id(db, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    _set_etag(response, etag)
     return job
 
 #Delete a job
 @router.delete("/{job_id}", response_model=schemas.Job)
-def delete_job_route(job_id: int, db: Session = Depends(get_db)):
-    db_job = crud.get_job_by_id(db, job_id)
+async def delete_job_route(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_job = await async_crud.get_job_by_id(db, job_id)
     if not db_job:
         raise HTTPException(status_code=404, detail = "Job not found")
-    return crud.delete_job(db=db, job_id=job_id)
+    return await async_crud.delete_job(db=db, job_id=job_id)
 
 #Update a job
 @router.put("/{job_id}", response_model=schemas.Job)
-def update_job(job_id: int, job_update: schemas.JobUpdate, db: Session = Depends(get_db)):
-    job = crud.update_job(db=db, job_id=job_id,job_update=job_update)
+async def update_job(job_id: int, job_update: schemas.JobUpdate, db: AsyncSession = Depends(get_async_db)):
+    job = await async_crud.update_job(db=db, job_id=job_id,job_update=job_update)
     if not job:
         raise HTTPException(status_code=404, detail= "Job not found")
     return job
 
-#Upload jobs in bulk
-@router.post("/batch", response_model=list[schemas.Job])
-def create_jobs_batch(jobs: list[schemas.JobCreate], db: Session = Depends(get_db)):
-    created_jobs = []
-    for job in jobs:
-        created = crud.create_job(db=db, job=job)
-        created_jobs.append(created)
-    return created_jobs
+#Upload jobs in bulk (upsert mode reports inserted/updated/unchanged per row)
+@router.post("/batch", response_model=Union[list[schemas.Job], list[schemas.UpsertResult]])
+async def create_jobs_batch(
+    jobs: list[schemas.JobCreate],
+    mode: Literal["skip", "upsert"] = Query("skip", description=MODE_DESCRIPTION),
+    merge: Optional[str] = Query(None, description=MERGE_DESCRIPTION),
+    similarity: Optional[float] = Query(None, gt=0, le=1, description=SIMILARITY_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    sync_db: Session = Depends(get_db)):
+    if mode == "upsert":
+        if similarity is not None:
+            raise HTTPException(status_code=400, detail="similarity only applies to mode=skip")
+        return await async_crud.upsert_jobs(db, jobs, _merge_policy(merge))
+    if similarity is not None:
+        #Fuzzy matching scores titles in Python, keep it off the event loop
+        return await run_in_threadpool(crud.create_jobs_batch, sync_db, jobs, similarity)
+    return await async_crud.create_jobs_batch(db=db, jobs=jobs)
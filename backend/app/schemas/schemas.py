@@ -1,7 +1,7 @@
 from pydantic import BaseModel 
-from typing import Optional 
+from typing import Literal, Optional 
 from datetime import date, datetime
-from pydantic import ConfigDict
+from pydantic import ConfigDict, field_validator
 
 class JobBase(BaseModel):
     title: str
@@ -33,9 +33,145 @@ class JobUpdate(JobBase):
     job_link: Optional[str] = None
     source: Optional[str] = None
     notes: Optional[str] = None
+
+    # May be left out, but not cleared: the columns are NOT NULL
+    @field_validator("title", "company", "location")
+    @classmethod
+    def not_null(cls, value: Optional[str]) -> str:
+        if value is None:
+            raise ValueError("cannot be null")
+        return value
     
 class Job(JobBase):
     model_config = ConfigDict(from_attributes=True)
     id: int
     created_at: datetime
     updated_at: datetime
+
+# Lean list row: what the job table shows, without the large text columns
+class JobSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    title: str
+    company: str
+    location: str
+    status: Optional[str] = None
+    applied_date: Optional[date] = None
+    follow_up_date: Optional[date] = None
+    job_link: Optional[str] = None
+    job_board_id: Optional[str] = None
+    source: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportChunkSummary(BaseModel):
+    chunk: int
+    created: int
+    skipped: int
+    invalid: int
+    updated: int = 0
+    unchanged: int = 0
+    errors: list[ImportRowError] = []
+
+class ImportSummary(BaseModel):
+    created: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    chunks: list[ImportChunkSummary] = []
+
+# Per-row outcome of an upsert keyed on job_board_id
+class UpsertResult(BaseModel):
+    id: int
+    job_board_id: Optional[str] = None
+    result: Literal["inserted", "updated", "unchanged"]
+
+# Status funnel: share of jobs entering a stage that moved on to each next one
+class FunnelTransition(BaseModel):
+    status: Optional[str] = None
+    count: int
+    conversion: Optional[float] = None
+
+class FunnelStage(BaseModel):
+    status: str
+    entered: int
+    exited: int
+    median_dwell_hours: Optional[int] = None
+    next: list[FunnelTransition] = []
+
+class StatusFunnel(BaseModel):
+    stages: list[FunnelStage]
+
+# Applications by applied_date bucket; responses are jobs that moved past Applied
+class TimeseriesPoint(BaseModel):
+    bucket: date
+    source: Optional[str] = None
+    applications: int
+    responses: int
+    by_status: dict[str, int] = {}
+
+class JobTimeseries(BaseModel):
+    granularity: Literal["day", "week", "month"]
+    start: date
+    end: date
+    points: list[TimeseriesPoint]
+
+# Likely duplicate: `id` is the newer job, `duplicate_of` the older one
+class DuplicatePair(BaseModel):
+    id: int
+    duplicate_of: int
+    score: float
+    reason: Literal["link", "title"]
+
+# Delta since a change sequence; seq is the next `since`
+class JobChanges(BaseModel):
+    seq: int
+    changed: list[Job]
+    deleted: list[int]
+
+# A due or overdue follow-up reminder
+class FollowUp(BaseModel):
+    id: int
+    title: str
+    company: str
+    location: str
+    status: Optional[str] = None
+    follow_up_date: date
+    job_link: Optional[str] = None
+    overdue: bool
+
+class JobStats(BaseModel):
+    total: int
+    by_status: dict[str, int]
+
+class JobPage(BaseModel):
+    items: list[Job]
+    next_cursor: Optional[str] = None
+
+# Bulk operations target explicit ids and/or the /jobs/search filters;
+# every given criterion narrows the set
+class JobSelection(BaseModel):
+    ids: Optional[list[int]] = None
+    company: Optional[str] = None
+    title: Optional[str] = None
+    location: Optional[str] = None
+    status: Optional[str] = None
+    q: Optional[str] = None
+
+    def filters(self) -> dict[str, str]:
+        names = ("company", "title", "location", "status", "q")
+        return {name: getattr(self, name) for name in names if getattr(self, name)}
+
+    def is_empty(self) -> bool:
+        return self.ids is None and not self.filters()
+
+class JobBulkUpdate(JobSelection):
+    changes: JobUpdate
+
+class BulkResult(BaseModel):
+    affected: int
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# (cutoff, batch_size) -> number of jobs archived in that batch's transaction
+ArchiveBatch = Callable[[datetime, int], Awaitable[int]]
+
+
+@dataclass
+class ArchiveSettings:
+    # Days since a closed job was last updated before it is archived
+    after_days: int = 90
+    batch_size: int = 500
+    # Seconds between background runs; 0 disables the background archiver
+    interval: float = 3600.0
+    # Pause between batches so other writers get the database lock
+    pause: float = 0.05
+
+    @classmethod
+    def from_env(cls) -> "ArchiveSettings":
+        return cls(
+            after_days=int(os.getenv("ARCHIVE_AFTER_DAYS", "90")),
+            batch_size=int(os.getenv("ARCHIVE_BATCH_SIZE", "500")),
+            interval=float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600")),
+        )
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        return (now or datetime.now(timezone.utc)) - timedelta(days=self.after_days)
+
+
+async def archive_closed_jobs(
+    archive_batch: ArchiveBatch, settings: ArchiveSettings, now: Optional[datetime] = None
+) -> int:
+    """
+    Archives everything past the cutoff, one short transaction per batch,
+    until a batch comes back short. Returns the number of archived jobs.
+    """
+    cutoff = settings.cutoff(now)
+    total = 0
+    while True:
+        archived = await archive_batch(cutoff, settings.batch_size)
+        total += archived
+        if archived < settings.batch_size:
+            return total
+        await asyncio.sleep(settings.pause)
+
+
+class Archiver:
+    """Runs archive_closed_jobs every settings.interval seconds in the background."""
+
+    def __init__(self, archive_batch: ArchiveBatch, settings: ArchiveSettings) -> None:
+        self._archive_batch = archive_batch
+        self.settings = settings
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.interval)
+            try:
+                archived = await archive_closed_jobs(self._archive_batch, self.settings)
+            except Exception:
+                logger.exception("Archiving closed jobs failed")
+                continue
+            if archived:
+                logger.info("Archived %d closed jobs", archived)
+
+    def start(self) -> None:
+        if self.settings.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+settings = ArchiveSettings.from_env()
@@ -0,0 +1,148 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Iterable, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+# Default title similarity (Jaccard over normalized tokens) for a duplicate
+DEFAULT_THRESHOLD = 0.8
+
+# Trailing legal-form words that do not distinguish companies ("Acme Inc." == "ACME")
+COMPANY_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "ltd", "limited", "corp", "corporation",
+    "co", "company", "gmbh", "plc", "ag", "sa", "bv", "pty",
+}
+
+TITLE_ABBREVIATIONS = {
+    "sr": "senior",
+    "snr": "senior",
+    "jr": "junior",
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "eng": "engineer",
+    "engr": "engineer",
+    "dev": "developer",
+    "mgr": "manager",
+    "ml": "machine learning",
+    "fe": "frontend",
+    "be": "backend",
+    "fullstack": "full stack",
+}
+TITLE_STOPWORDS = {"a", "an", "and", "the", "of", "for", "to", "in", "at"}
+
+# Query parameters that identify a posting; everything else (utm_*, refs) is noise
+LINK_ID_PARAMS = {"gh_jid", "jk", "jobid", "job_id", "currentjobid", "id"}
+
+# Source column -> key column
+KEY_COLUMNS = {
+    "company": "company_key",
+    "title": "title_key",
+    "location": "location_key",
+    "job_link": "link_key",
+}
+
+
+def _words(value: str) -> list[str]:
+    value = value.lower().replace("&", " and ")
+    # "front-end" -> "frontend", other punctuation separates words
+    value = re.sub(r"(?<=\w)[-'.](?=\w)", "", value)
+    return re.findall(r"\w+", value)
+
+
+def normalize_company(company: Optional[str]) -> Optional[str]:
+    words = _words(company or "")
+    if words and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words) or None
+
+
+def normalize_title(title: Optional[str]) -> Optional[str]:
+    """Sorted set of expanded title words: "Sr. SWE" -> "engineer senior software"."""
+    tokens = set()
+    for word in _words(title or ""):
+        for token in TITLE_ABBREVIATIONS.get(word, word).split():
+            if token not in TITLE_STOPWORDS:
+                tokens.add(token)
+    return " ".join(sorted(tokens)) or None
+
+
+def normalize_location(location: Optional[str]) -> Optional[str]:
+    words = _words(location or "")
+    if "remote" in words:
+        return "remote"
+    return " ".join(words) or None
+
+
+def normalize_link(link: Optional[str]) -> Optional[str]:
+    if not link or not link.strip():
+        return None
+    parts = urlsplit(link.strip() if "//" in link else f"//{link.strip()}")
+    host = (parts.hostname or "").removeprefix("www.")
+    path = parts.path.rstrip("/").lower()
+    params = sorted(
+        (key.lower(), value) for key, value in parse_qsl(parts.query) if key.lower() in LINK_ID_PARAMS
+    )
+    query = "&".join(f"{key}={value}" for key, value in params)
+    return f"{host}{path}" + (f"?{query}" if query else "") or None
+
+
+_NORMALIZERS = {
+    "company": normalize_company,
+    "title": normalize_title,
+    "location": normalize_location,
+    "job_link": normalize_link,
+}
+
+
+def key_values(values: dict[str, Any]) -> dict[str, Optional[str]]:
+    # Key columns for whichever source columns are present in `values`
+    return {
+        KEY_COLUMNS[name]: _NORMALIZERS[name](value)
+        for name, value in values.items() if name in KEY_COLUMNS
+    }
+
+
+def job_keys(job: Any) -> dict[str, Optional[str]]:
+    return key_values({name: getattr(job, name) for name in KEY_COLUMNS})
+
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def locations_compatible(a: Optional[str], b: Optional[str]) -> bool:
+    # Unknown matches anything; "San Francisco" matches "San Francisco, CA"
+    if not a or not b:
+        return True
+    a_words, b_words = set(a.split()), set(b.split())
+    return a_words <= b_words or b_words <= a_words
+
+
+def similar_pairs(
+    rows: list[Any], threshold: float = DEFAULT_THRESHOLD
+) -> Iterable[tuple[Any, Any, float]]:
+    """
+    Pairs of rows (id, title_key, location_key) within one block whose
+    title Jaccard similarity reaches the threshold and whose locations are
+    compatible. Prefix filtering: with tokens ordered rarest first, two
+    sets can only reach the threshold if they share a token among the
+    first len - ceil(threshold * len) + 1, so only those are indexed.
+    """
+    frequency = Counter(token for row in rows for token in set((row.title_key or "").split()))
+    index: dict[str, list[int]] = {}
+    ordered: list[list[str]] = []
+    for position, row in enumerate(rows):
+        tokens = sorted(set((row.title_key or "").split()), key=lambda t: (frequency[t], t))
+        ordered.append(tokens)
+        prefix = len(tokens) - math.ceil(threshold * len(tokens)) + 1
+        candidates = {other for token in tokens[:prefix] for other in index.get(token, ())}
+        for other in sorted(candidates):
+            score = jaccard(set(tokens), set(ordered[other]))
+            if score >= threshold and locations_compatible(row.location_key, rows[other].location_key):
+                yield rows[other], row, score
+        for token in tokens[:prefix]:
+            index.setdefault(token, []).append(position)
@@ -0,0 +1,34 @@
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Sequence
+
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - stdlib fallback produces the same bytes, just slower
+    orjson = None
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, datetime):
+        # Match pydantic / orjson: UTC offsets are rendered as "Z"
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encodes plain Python values to compact JSON bytes, byte-for-byte the
+    same as FastAPI's JSONResponse for the types the jobs API returns.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def rows_to_dicts(rows: Iterable[Any], names: Sequence[str]) -> list[dict[str, Any]]:
+    # Column rows (named tuples) straight to dicts, no per-row model validation
+    return [{name: getattr(row, name) for name in names} for row in rows]
@@ -0,0 +1,139 @@
+import asyncio
+import heapq
+import logging
+import threading
+from datetime import date, datetime, time
+from typing import Callable, Iterable, Optional
+
+from . import job_events
+from ..models.models import CLOSED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Local time of day a follow-up date becomes due
+REMIND_AT = time(9, 0)
+
+# (job_id, follow_up_date, status); a None date unschedules the job
+FollowUpEntry = tuple[int, Optional[date], Optional[str]]
+
+
+def is_open(status: Optional[str]) -> bool:
+    return status not in CLOSED_STATUSES
+
+
+class FollowUpScheduler:
+    """
+    Keeps upcoming follow-ups in a min-heap and sleeps until the earliest
+    one. Writes reschedule single jobs via update(); the table is only read
+    once, on start. Superseded heap entries are skipped lazily.
+    """
+
+    def __init__(self, on_due: Callable[[list[int]], None], remind_at: time = REMIND_AT) -> None:
+        self._on_due = on_due
+        self._remind_at = remind_at
+        self._heap: list[tuple[datetime, int]] = []
+        self._due: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def due_at(self, follow_up_date: date) -> datetime:
+        return datetime.combine(follow_up_date, self._remind_at)
+
+    def load(self, entries: Iterable[FollowUpEntry], now: Optional[datetime] = None) -> None:
+        # Initial fill; follow-ups already past are left to the overdue list
+        now = now or datetime.now()
+        with self._lock:
+            self._due = {
+                job_id: self.due_at(follow_up_date)
+                for job_id, follow_up_date, status in entries
+                if follow_up_date and is_open(status) and self.due_at(follow_up_date) > now
+            }
+            self._heap = [(when, job_id) for job_id, when in self._due.items()]
+            heapq.heapify(self._heap)
+        self._wake()
+
+    def update(self, entries: Iterable[FollowUpEntry]) -> None:
+        # Thread-safe: called after commits, from whichever thread ran the write
+        with self._lock:
+            for job_id, follow_up_date, status in entries:
+                if not follow_up_date or not is_open(status):
+                    self._due.pop(job_id, None)
+                    continue
+                when = self.due_at(follow_up_date)
+                if self._due.get(job_id) != when:
+                    self._due[job_id] = when
+                    heapq.heappush(self._heap, (when, job_id))
+            if len(self._heap) > 2 * len(self._due) + 64:
+                # Too many superseded entries, rebuild
+                self._heap = [(when, job_id) for job_id, when in self._due.items()]
+                heapq.heapify(self._heap)
+        self._wake()
+
+    def next_due(self) -> Optional[datetime]:
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> list[int]:
+        due: list[int] = []
+        with self._lock:
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                _, job_id = heapq.heappop(self._heap)
+                del self._due[job_id]
+                due.append(job_id)
+                self._drop_stale()
+        return due
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            due = self.pop_due(datetime.now())
+            if due:
+                try:
+                    self._on_due(due)
+                except Exception:
+                    logger.exception("Follow-up reminder callback failed")
+            next_due = self.next_due()
+            timeout = None if next_due is None else max((next_due - datetime.now()).total_seconds(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, entries: Iterable[FollowUpEntry]) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.load(entries)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = self._loop = self._wakeup = None
+
+
+def _publish_due(job_ids: list[int]) -> None:
+    job_events.broker.publish(
+        job_events.job_event(None, "follow_up_due", job_ids, ["follow_up_date"])
+    )
+
+
+scheduler = FollowUpScheduler(_publish_due)
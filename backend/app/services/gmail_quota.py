@@ -0,0 +1,106 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Callable
+
+# Gmail's per-user limit is 250 quota units per second (moving average).
+# Stay below it so other clients of the same mailbox keep some headroom.
+QUOTA_UNITS_PER_SECOND = 250
+DEFAULT_RATE = min(float(os.getenv("GMAIL_QUOTA_UNITS_PER_SECOND", "200")), QUOTA_UNITS_PER_SECOND)
+
+# Quota units charged per call; a batch is charged for each sub-request
+METHOD_UNITS = {
+    "messages.list": 5,
+    "messages.get": 5,
+    "history.list": 2,
+    "getProfile": 1,
+}
+
+# Longest backoff between retries of a throttled or failed call
+BACKOFF_CAP = 32.0
+
+
+def backoff_delay(attempt: int, base: float, cap: float = BACKOFF_CAP) -> float:
+    # Full jitter over an exponentially growing window, so concurrent
+    # workers do not retry in lockstep
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` units per second, holding at
+    most `capacity`. acquire() reserves its units up front and may leave the
+    bucket in debt, so calls larger than the capacity (a 100-message batch)
+    still go through, and waiting callers are served in arrival order.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, units: float) -> float:
+        # Blocks until the units are covered; returns the seconds waited
+        with self._lock:
+            self._refill()
+            self._tokens -= units
+            wait = max(0.0, -self._tokens / self.rate)
+        if wait:
+            self._sleep(wait)
+        return wait
+
+    def drain(self) -> None:
+        # The server throttled us: whatever burst is left is not really there
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+
+class FetchStats:
+    """Counters for Gmail calls, shared by all fetch workers."""
+
+    FIELDS = ("requests", "quota_units", "messages", "throttled", "retries", "failed", "wait_seconds")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+            self._started = time.monotonic()
+
+    def add(self, **counts: float) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                self._counts[name] += value
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+            elapsed = time.monotonic() - self._started
+        counts["wait_seconds"] = round(counts["wait_seconds"], 3)
+        counts["elapsed_seconds"] = round(elapsed, 3)
+        counts["messages_per_second"] = round(counts["messages"] / elapsed, 2) if elapsed else 0.0
+        counts["quota_units_per_second"] = round(counts["quota_units"] / elapsed, 2) if elapsed else 0.0
+        return counts
+
+
+limiter = TokenBucket(rate=DEFAULT_RATE, capacity=DEFAULT_RATE)
+stats = FetchStats()
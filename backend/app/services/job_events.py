@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from typing import Any, Optional
+
+# Per-subscriber queue bound; a subscriber that falls this far behind has its
+# backlog replaced by a single "resync" event
+MAX_QUEUED_EVENTS = 100
+
+JobEvent = dict[str, Any]
+
+
+class Subscription:
+    """One listener's bounded queue, bound to the event loop it was created on."""
+
+    def __init__(self, broker: "JobEventBroker", maxsize: int) -> None:
+        self._broker = broker
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[JobEvent] = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def _push(self, event: JobEvent) -> None:
+        if self._queue.full():
+            # Coalesce: the client catches up from the change feed instead
+            self.dropped += self._queue.qsize()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait({"op": "resync", "seq": event["seq"]})
+            return
+        self._queue.put_nowait(event)
+
+    def deliver(self, event: JobEvent) -> bool:
+        # Callable from any thread; False once the subscriber's loop is gone
+        try:
+            self._loop.call_soon_threadsafe(self._push, event)
+        except RuntimeError:
+            return False
+        return True
+
+    async def get(self) -> JobEvent:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+
+class JobEventBroker:
+    """
+    In-process pub/sub for job mutations. Publishing never blocks and never
+    queries the database; each subscriber has its own bounded queue.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, maxsize: int = MAX_QUEUED_EVENTS) -> Subscription:
+        subscription = Subscription(self, maxsize)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: JobEvent) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if not subscription.deliver(event):
+                self.unsubscribe(subscription)
+
+
+broker = JobEventBroker()
+
+
+def job_event(
+    seq: Optional[int], op: str, job_ids: list[int], fields: Optional[list[str]] = None
+) -> JobEvent:
+    # Compact payload: which jobs, what happened, and which columns changed
+    # (None means all of them). Events that are not writes carry no seq.
+    return {"seq": seq, "op": op, "ids": job_ids, "fields": fields}
@@ -0,0 +1,122 @@
+import csv
+import io
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from . import fast_json
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ModuleNotFoundError:  # pragma: no cover - parquet export is disabled without pyarrow
+    pyarrow = None
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Batches of row tuples, in the column order of `names`
+RowBatches = AsyncIterator[Sequence[Sequence[Any]]]
+
+
+class ExportFormatError(ValueError):
+    """Raised when the requested export format cannot be produced."""
+
+
+def _csv_value(value: Any) -> Any:
+    # str(datetime) uses a space separator; keep ISO 8601 like the JSON API
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _iter_csv(batches: RowBatches, names: list[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(names)
+    yield buffer.getvalue().encode("utf-8")
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _iter_ndjson(batches: RowBatches, names: list[str]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield b"".join(fast_json.dumps(dict(zip(names, row))) + b"\n" for row in batch)
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file that hands out what was written since the last drain.
+    # tell() keeps counting so the parquet footer offsets stay correct.
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _arrow_type(python_type: type) -> Any:
+    if python_type is int:
+        return pyarrow.int64()
+    if python_type is datetime:
+        return pyarrow.timestamp("us", tz="UTC")
+    if python_type is date:
+        return pyarrow.date32()
+    return pyarrow.string()
+
+
+async def _iter_parquet(
+    batches: RowBatches, names: list[str], types: dict[str, type]
+) -> AsyncIterator[bytes]:
+    schema = pyarrow.schema([(name, _arrow_type(types[name])) for name in names])
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(sink, mode="w"), schema)
+    try:
+        # One row group per batch
+        async for batch in batches:
+            columns = list(zip(*batch))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def encode_export(
+    file_format: str,
+    batches: RowBatches,
+    names: list[str],
+    types: Optional[dict[str, type]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Encodes row batches as they arrive, so only one batch is held in
+    memory. Parquet needs the Python type of every column.
+    """
+    if file_format == "csv":
+        return _iter_csv(batches, names)
+    if file_format == "ndjson":
+        return _iter_ndjson(batches, names)
+    if file_format == "parquet":
+        if pyarrow is None:
+            raise ExportFormatError("Parquet export requires pyarrow")
+        return _iter_parquet(batches, names, types or {})
+    raise ExportFormatError(f"Unsupported export format: {file_format}")
@@ -0,0 +1,182 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Optional, Union
+
+from pydantic import ValidationError
+
+from ..schemas import schemas
+
+# Same columns the upload modal accepts
+REQUIRED_FIELDS = ["title", "company", "location"]
+OPTIONAL_FIELDS = [
+    "status",
+    "applied_date",
+    "follow_up_date",
+    "job_link",
+    "job_description",
+    "job_board_id",
+    "source",
+    "notes",
+]
+VALID_FIELDS = REQUIRED_FIELDS + OPTIONAL_FIELDS
+
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+# Row errors reported per chunk; the rest are only counted
+MAX_ERRORS_PER_CHUNK = 20
+
+
+class ImportFormatError(ValueError):
+    """Raised when the uploaded file cannot be imported at all (bad header, encoding...)."""
+
+
+ParsedRow = Union[schemas.JobCreate, schemas.ImportRowError]
+# A parsed chunk: valid jobs, the first rows that failed validation and
+# how many failed in total
+ParsedChunk = tuple[list[schemas.JobCreate], list[schemas.ImportRowError], int]
+
+
+def detect_format(requested: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    if requested:
+        requested = requested.lower()
+        return requested if requested in ("csv", "ndjson") else None
+    mime = (content_type or "").split(";")[0].strip().lower()
+    if mime in CSV_CONTENT_TYPES:
+        return "csv"
+    if mime in NDJSON_CONTENT_TYPES:
+        return "ndjson"
+    return None
+
+
+# Check headers for missing or extra columns
+def validate_headers(headers: list[str]) -> tuple[list[str], list[str]]:
+    missing = [f for f in REQUIRED_FIELDS if f not in headers]
+    extra = [h for h in headers if h not in VALID_FIELDS]
+    return missing, extra
+
+
+async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # Decode incrementally so multi-byte characters may straddle network chunks
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    try:
+        async for data in stream:
+            buffer += decoder.decode(data)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                yield line + "\n"
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as exc:
+        raise ImportFormatError("File is not valid UTF-8") from exc
+    if buffer:
+        yield buffer
+
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[list[str]]:
+    # Join physical lines until quotes balance, so quoted fields may contain newlines
+    pending = ""
+    quotes = 0
+    async for line in lines:
+        pending += line
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        record = next(csv.reader([pending]), [])
+        pending, quotes = "", 0
+        if any(value.strip() for value in record):
+            yield record
+    if pending.strip():
+        raise ImportFormatError("Unterminated quoted field at end of file")
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+    )
+
+
+def _build_job(row_number: int, data: dict[str, Any]) -> ParsedRow:
+    # Blank cells fall back to the schema defaults
+    values = {key: value for key, value in data.items() if value not in ("", None)}
+    try:
+        return schemas.JobCreate(**values)
+    except ValidationError as exc:
+        return schemas.ImportRowError(row=row_number, error=_format_validation_error(exc))
+
+
+async def _iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRow]:
+    records = _iter_csv_records(lines)
+    try:
+        header_record = await records.__anext__()
+    except StopAsyncIteration:
+        raise ImportFormatError("File is empty") from None
+    headers = [h.strip().lower() for h in header_record]
+    missing, extra = validate_headers(headers)
+    if missing:
+        raise ImportFormatError(f"Missing required columns: {', '.join(missing)}")
+    if extra:
+        raise ImportFormatError(f"Unrecognized columns: {', '.join(extra)}")
+
+    row_number = 0
+    async for record in records:
+        row_number += 1
+        if len(record) > len(headers):
+            yield schemas.ImportRowError(
+                row=row_number,
+                error=f"Expected {len(headers)} columns, got {len(record)}",
+            )
+            continue
+        yield _build_job(row_number, dict(zip(headers, (value.strip() for value in record))))
+
+
+async def _iter_ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRow]:
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield schemas.ImportRowError(row=row_number, error=f"Invalid JSON: {exc.msg}")
+            continue
+        if not isinstance(data, dict):
+            yield schemas.ImportRowError(row=row_number, error="Expected a JSON object")
+            continue
+        data = {str(key).strip().lower(): value for key, value in data.items()}
+        _, extra = validate_headers(list(data))
+        if extra:
+            yield schemas.ImportRowError(
+                row=row_number, error=f"Unrecognized columns: {', '.join(extra)}"
+            )
+            continue
+        yield _build_job(row_number, data)
+
+
+async def iter_import_chunks(
+    stream: AsyncIterator[bytes], file_format: str, chunk_size: int
+) -> AsyncIterator[ParsedChunk]:
+    """
+    Parses an uploaded CSV or NDJSON body as it arrives and yields
+    fixed-size chunks, so only one chunk is held in memory at a time.
+    Only the first MAX_ERRORS_PER_CHUNK row errors of a chunk are kept.
+    """
+    lines = _iter_lines(stream)
+    rows = _iter_csv_rows(lines) if file_format == "csv" else _iter_ndjson_rows(lines)
+    jobs: list[schemas.JobCreate] = []
+    errors: list[schemas.ImportRowError] = []
+    invalid = 0
+    async for row in rows:
+        if isinstance(row, schemas.ImportRowError):
+            invalid += 1
+            if len(errors) < MAX_ERRORS_PER_CHUNK:
+                errors.append(row)
+        else:
+            jobs.append(row)
+        if len(jobs) + invalid >= chunk_size:
+            yield jobs, errors, invalid
+            jobs, errors, invalid = [], [], 0
+    if jobs or invalid:
+        yield jobs, errors, invalid
@@ -1,28 +1,28 @@
 import { render, screen, waitFor } from "@testing-library/react";
 import { vi } from "vitest";
 import Dashboard from "../src/pages/Dashboard";
-import { listJobs } from "../src/api/jobs";
-import { mockJobs } from "./MockJobs";
+import { getJobStats } from "../src/api/jobs";
 
 vi.mock("../src/api/jobs", () => ({
-    listJobs: vi.fn(),
+    getJobStats: vi.fn(),
     deleteJob: vi.fn(),
+    subscribeJobEvents: vi.fn(() => () => {}),
 }));
 
-const listJobsMock = vi.mocked(listJobs);
+const getJobStatsMock = vi.mocked(getJobStats);
 
 describe("Dashboard", () => {
     beforeEach(() => {
         vi.clearAllMocks();
     });
 
-    test("loads jobs and renders calculated dashboard metrics", async () => {
-        listJobsMock.mockResolvedValue(mockJobs);
+    test("loads stats and renders dashboard metrics", async () => {
+        getJobStatsMock.mockResolvedValue({ total: 5, by_status: { Applied: 4, Interview: 1 } });
 
         render(<Dashboard />);
 
         await waitFor(() => {
-            expect(listJobsMock).toHaveBeenCalledTimes(1);
+            expect(getJobStatsMock).toHaveBeenCalledTimes(1);
         });
 
         expect(screen.getByLabelText(/stats card for total jobs/i)).toHaveTextContent("5");
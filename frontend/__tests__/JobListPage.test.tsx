@@ -2,12 +2,13 @@ import { render, screen, waitFor } from "@testing-library/react";
 import userEvent from "@testing-library/user-event";
 import { vi } from "vitest";
 import JobListPage from "../src/pages/JobListPage";
-import { deleteJob, listJobs } from "../src/api/jobs";
+import { deleteJob, getJobChanges } from "../src/api/jobs";
 import { mockJobs } from "./MockJobs";
 
 vi.mock("../src/api/jobs", () => ({
-    listJobs: vi.fn(),
+    getJobChanges: vi.fn(),
     deleteJob: vi.fn(),
+    subscribeJobEvents: vi.fn(() => () => {}),
 }));
 
 vi.mock("../src/components/Modal", () => ({
@@ -66,20 +67,20 @@ vi.mock("../src/components/JobTable", () => ({
     ),
 }));
 
-const listJobsMock = vi.mocked(listJobs);
+const getJobChangesMock = vi.mocked(getJobChanges);
 const deleteJobMock = vi.mocked(deleteJob);
 
 describe("JobListPage", () => {
     beforeEach(() => {
         vi.clearAllMocks();
-        listJobsMock.mockResolvedValue(mockJobs);
+        getJobChangesMock.mockResolvedValue({ seq: 7, changed: mockJobs, deleted: [] });
     });
 
     test("loads jobs and opens the add-job modal", async () => {
         render(<JobListPage />);
 
         await waitFor(() => {
-            expect(listJobsMock).toHaveBeenCalledTimes(1);
+            expect(getJobChangesMock).toHaveBeenCalledTimes(1);
         });
         expect(screen.getByText("Rendered jobs: 5")).toBeInTheDocument();
 
@@ -89,28 +90,33 @@ describe("JobListPage", () => {
         expect(screen.getByText("Add job form")).toBeInTheDocument();
     });
 
-    test("refreshes the list after deleting a job", async () => {
+    test("applies the change feed delta after deleting a job", async () => {
         deleteJobMock.mockResolvedValue(undefined);
+        getJobChangesMock
+            .mockResolvedValueOnce({ seq: 7, changed: mockJobs, deleted: [] })
+            .mockResolvedValueOnce({ seq: 8, changed: [], deleted: [mockJobs[0].id] });
 
         render(<JobListPage />);
 
         await waitFor(() => {
-            expect(listJobsMock).toHaveBeenCalledTimes(1);
+            expect(getJobChangesMock).toHaveBeenCalledWith(0);
         });
+        expect(await screen.findByText("Rendered jobs: 5")).toBeInTheDocument();
 
         await userEvent.click(screen.getByRole("button", { name: /delete first job/i }));
 
         await waitFor(() => {
             expect(deleteJobMock).toHaveBeenCalledWith(mockJobs[0].id);
-            expect(listJobsMock).toHaveBeenCalledTimes(2);
+            expect(getJobChangesMock).toHaveBeenLastCalledWith(7);
         });
+        expect(await screen.findByText("Rendered jobs: 4")).toBeInTheDocument();
     });
 
     test("opens edit mode with the selected job", async () => {
         render(<JobListPage />);
 
         await waitFor(() => {
-            expect(listJobsMock).toHaveBeenCalledTimes(1);
+            expect(getJobChangesMock).toHaveBeenCalledTimes(1);
         });
 
         await userEvent.click(screen.getByRole("button", { name: /edit first job/i }));
@@ -122,7 +128,7 @@ describe("JobListPage", () => {
         render(<JobListPage />);
 
         await waitFor(() => {
-            expect(listJobsMock).toHaveBeenCalledTimes(1);
+            expect(getJobChangesMock).toHaveBeenCalledTimes(1);
         });
 
         await userEvent.click(screen.getByRole("button", { name: /upload file/i }));
@@ -131,7 +137,7 @@ describe("JobListPage", () => {
         await userEvent.click(screen.getByRole("button", { name: /finish upload/i }));
 
         await waitFor(() => {
-            expect(listJobsMock).toHaveBeenCalledTimes(2);
+            expect(getJobChangesMock).toHaveBeenCalledTimes(2);
         });
     });
 });
@@ -1,5 +1,5 @@
 import { api } from "./client";
-import type { Job, JobCreate, JobUpdate } from "../types/job";
+import type { Job, JobChanges, JobCreate, JobStats, JobUpdate } from "../types/job";
 
 // Get all jobs
 export async function listJobs(): Promise<Job[]> {
@@ -7,6 +7,29 @@ export async function listJobs(): Promise<Job[]> {
     return res.data;
 }
 
+// Jobs changed or deleted since a change sequence (0 returns every job)
+export async function getJobChanges(since: number): Promise<JobChanges> {
+    const res = await api.get<JobChanges>("/jobs/changes", { params: { since } });
+    return res.data;
+}
+
+// Call onChange whenever a job is created, updated, deleted or archived anywhere.
+// Returns a function that closes the stream.
+export function subscribeJobEvents(onChange: () => void): () => void {
+    if (typeof EventSource === "undefined") {
+        return () => {};
+    }
+    const source = new EventSource(`${api.defaults.baseURL}/jobs/events`);
+    ["created", "updated", "deleted", "archived", "resync"].forEach((op) => source.addEventListener(op, onChange));
+    return () => source.close();
+}
+
+// Get total and per-status job counts
+export async function getJobStats(): Promise<JobStats> {
+    const res = await api.get<JobStats>("/jobs/stats");
+    return res.data;
+}
+
 // Create a new job
 export async function createJob(payload: JobCreate): Promise<Job> {
     const res = await api.post<Job>("/jobs/", payload);
@@ -1,34 +1,36 @@
 import { useEffect, useState } from "react";
-import { deleteJob, listJobs } from "../api/jobs";
-import type { Job } from "../types/job";
+import { deleteJob, getJobStats, subscribeJobEvents } from "../api/jobs";
+import type { Job, JobStats } from "../types/job";
 import JobForm from "../components/JobForm";
 import Modal from "../components/Modal";
 import JobTable from "../components/JobTable";
 import DashboardMetrics from "../components/DashboardMetrics";
 
 export default function Dashboard() {
-  const [jobs, setJobs] = useState<Job[]>([]);
+  const [stats, setStats] = useState<JobStats>({ total: 0, by_status: {} });
   const [refreshKey, setRefreshKey] = useState(0);
   const [showModal, setShowModal] = useState(false);
   const [editingJob, setEditingJob] = useState<Job | null>(null);
 
   useEffect(() => {
-    async function loadJobs() {
-      const data = await listJobs();
-      setJobs(data);
+    async function loadStats() {
+      const data = await getJobStats();
+      setStats(data);
     }
-    loadJobs();
+    loadStats();
   }, [refreshKey]);
 
+  useEffect(() => subscribeJobEvents(() => setRefreshKey((k) => k + 1)), []);
+
   return (
     <div className="min-h-screen w-full bg-gray-50 p-4 overflow-visible">
         {/*Dashboard Metrics*/}
         <DashboardMetrics
-            total={jobs.length}
-            applied={jobs.filter((j) => j.status === "Applied").length}
-            interviewing={jobs.filter((j) => j.status === "Interview").length}
-            offers={jobs.filter((j) => j.status === "Offer").length}
-            rejected={jobs.filter((j) => j.status === "Rejected").length}
+            total={stats.total}
+            applied={stats.by_status.Applied ?? 0}
+            interviewing={stats.by_status.Interview ?? 0}
+            offers={stats.by_status.Offer ?? 0}
+            rejected={stats.by_status.Rejected ?? 0}
         />
 
     </div>
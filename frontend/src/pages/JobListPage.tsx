@@ -1,11 +1,18 @@
-import { useEffect, useState } from "react";
-import type { Job } from "../types/job";
-import { listJobs, deleteJob } from "../api/jobs";
+import { useEffect, useRef, useState } from "react";
+import type { Job, JobChanges } from "../types/job";
+import { getJobChanges, deleteJob, subscribeJobEvents } from "../api/jobs";
 import Modal from "../components/Modal";
 import JobTable from "../components/JobTable";
 import JobForm from "../components/JobForm";
 import UploadJobsModal from "../components/UploadJobsModal";
 
+// Patch the local copy with a change feed delta, keeping id order
+function applyChanges(jobs: Job[], changes: JobChanges): Job[] {
+    const byId = new Map(jobs.map((job) => [job.id, job]));
+    changes.deleted.forEach((id) => byId.delete(id));
+    changes.changed.forEach((job) => byId.set(job.id, job));
+    return [...byId.values()].sort((a, b) => a.id - b.id);
+}
 
 export default function JobListPage() {
     const [jobs, setJobs] = useState<Job[]>([]);
@@ -14,15 +21,39 @@ export default function JobListPage() {
     const [editingJob, setEditingJob] = useState<Job | null>(null);
     const [showUploadModal, setShowUploadModal] = useState(false);
 
-    // Load all jobs
+    const seq = useRef(0);
+    const loading = useRef(false);
+    const reloadQueued = useRef(false);
+
+    // Load all jobs once, then only what changed since the last load.
+    // One fetch at a time: events arriving meanwhile queue a single rerun,
+    // so an older response can never land after a newer one.
     useEffect(() => {
         async function loadJobs() {
-            const res = await listJobs();
-            setJobs(res);
+            if (loading.current) {
+                reloadQueued.current = true;
+                return;
+            }
+            loading.current = true;
+            try {
+                do {
+                    reloadQueued.current = false;
+                    const changes = await getJobChanges(seq.current);
+                    if (changes.seq > seq.current) {
+                        seq.current = changes.seq;
+                        setJobs((current) => applyChanges(current, changes));
+                    }
+                } while (reloadQueued.current);
+            } finally {
+                loading.current = false;
+            }
         }
         loadJobs();
     }, [refreshKey]);
 
+    // Changes made elsewhere (other tabs, imports, Gmail) trigger the same delta fetch
+    useEffect(() => subscribeJobEvents(() => setRefreshKey((k) => k + 1)), []);
+
     return(
         <div className="min-h-screen w-full overflow-visible space-y-3 p-4 bg-gray-50">
             <div 
@@ -20,3 +20,14 @@ export interface Job {
 
 export type JobCreate = Omit<Job, "id" | "created_at" | "updated_at">;
 export type JobUpdate = Partial<JobCreate>;
+
+export interface JobStats {
+    total: number;
+    by_status: Partial<Record<JobStatus, number>>;
+}
+
+export interface JobChanges {
+    seq: number;
+    changed: Job[];
+    deleted: number[];
+}